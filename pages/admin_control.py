@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 from utils.auth import get_authenticator, check_authentication
 from utils.logout_handler import check_logout_status, is_authenticated
 from utils.database import add_user_to_firestore, get_all_roles, get_all_divisions, db, get_or_create_role, get_or_create_division
-from utils.leave_system_db import reset_annual_leave_quotas, LEAVE_TYPES
+from utils.leave_system_db import reset_annual_leave_quotas, backfill_request_user_snapshots, LEAVE_TYPES, LEAVE_TYPE_NAMES, get_leave_request_counts, get_query_executor
 import pandas as pd
 from firebase_admin.firestore import SERVER_TIMESTAMP
 
@@ -12,7 +12,7 @@ from firebase_admin.firestore import SERVER_TIMESTAMP
 if check_logout_status():
     st.switch_page("pages/login.py")
 
-authenticator = check_authentication()
+check_authentication()
 
 if not is_authenticated():
     st.warning("You must log in first.")
@@ -48,16 +48,27 @@ with col2:
         st.switch_page("pages/leave_approval.py")
 # st.markdown("---")
 
+# Fields read from users_db on this page
+USER_LIST_FIELDS = [
+    "name", "email", "role_name", "division_name", "access_level",
+    "is_active", "start_joining_date", "direct_supervisor_id"
+]
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_users_by_id():
+    """All users_db documents keyed by employee ID, shared by every tab on this page"""
+    query = db.collection("users_db").select(USER_LIST_FIELDS)
+    return {doc.id: doc.to_dict() for doc in query.stream()}
+
 def get_potential_supervisors():
     """Get all users who can be supervisors (access levels 1-3)"""
     try:
-        users_query = db.collection("users_db").where("access_level", "in", [1, 2, 3]).where("is_active", "==", True).stream()
         supervisors = []
         
-        for doc in users_query:
-            user_info = doc.to_dict()
-            user_info["employee_id"] = doc.id
-            supervisors.append(user_info)
+        for user_id, user_info in load_users_by_id().items():
+            if user_info.get("access_level") in [1, 2, 3] and user_info.get("is_active") is True:
+                user_info["employee_id"] = user_id
+                supervisors.append(user_info)
         
         return supervisors
     except Exception as e:
@@ -90,6 +101,17 @@ def add_user_with_supervisor(user_data_new):
 st.title("⚙️ Admin Control Panel")
 st.info(f"👤 Logged in as: **{user_data.get('name')}** (Administrator)")
 
+# The users scan (user management, stats) runs on the shared pool while this thread
+# counts leave requests (reports); the counts fan out onto the same pool themselves,
+# so they must not be submitted to it
+current_year = datetime.now().year
+users_future = get_query_executor().submit(load_users_by_id)
+request_counts = get_leave_request_counts(current_year)
+try:
+    users_future.result()
+except Exception as e:
+    st.error(f"Error loading users: {e}")
+
 # Create tabs for different admin functions
 tab1, tab2, tab3, tab4 = st.tabs(["User Management", "Leave System", "Reports", "System Settings"])
 
@@ -252,6 +274,7 @@ with tab1:
                         if selected_division not in division_names:
                             get_or_create_division(selected_division)
 
+                        load_users_by_id.clear()
                         st.balloons()
                     else:
                         st.error("❌ Failed to create user. Please check the logs for details.")
@@ -261,28 +284,16 @@ with tab1:
     
     try:
         # Get all users with enriched data
-        users_query = db.collection("users_db").stream()
-        users_list = []
-        
-        # Create supervisor lookup
-        supervisor_lookup = {}
-        for doc in users_query:
-            user_info = doc.to_dict()
-            user_info["employee_id"] = doc.id
-            users_list.append(user_info)
-            supervisor_lookup[doc.id] = user_info.get("name", "Unknown")
+        users_by_id = load_users_by_id()
         
-        if users_list:
-            # Enhance user data with supervisor names
-            for user in users_list:
-                supervisor_id = user.get("direct_supervisor_id")
-                if supervisor_id and supervisor_id in supervisor_lookup:
-                    user["supervisor_name"] = supervisor_lookup[supervisor_id]
-                else:
-                    user["supervisor_name"] = "No Direct Supervisor"
-            
-            # Convert to DataFrame for better display
-            df = pd.DataFrame(users_list)
+        if users_by_id:
+            # Resolve supervisor names with one indexed lookup instead of a second walk over users
+            df = pd.DataFrame([
+                {"name": "Unknown", "direct_supervisor_id": None, **user_info, "employee_id": user_id}
+                for user_id, user_info in users_by_id.items()
+            ])
+            supervisor_names = df.set_index("employee_id")["name"].fillna("Unknown")
+            df["supervisor_name"] = df["direct_supervisor_id"].map(supervisor_names).fillna("No Direct Supervisor")
             
             # Select columns to display including supervisor
             display_columns = ["name", "email", "role_name", "division_name", "supervisor_name", "access_level", "is_active", "start_joining_date"]
@@ -294,19 +305,19 @@ with tab1:
                 hide_index=True
             )
             
-            st.info(f"Total users: {len(users_list)}")
+            st.info(f"Total users: {len(df)}")
             
             # Show supervisor statistics
-            supervisor_stats = df["supervisor_name"].value_counts()
+            supervisor_stats = df["supervisor_name"].value_counts(sort=False)
             if len(supervisor_stats) > 1:
                 st.markdown("### 👥 Reporting Structure Overview")
                 col1, col2 = st.columns(2)
                 
                 with col1:
                     st.write("**Direct Reports Count:**")
-                    for supervisor, count in supervisor_stats.head(10).items():
-                        if supervisor != "No Direct Supervisor":
-                            st.write(f"• {supervisor}: {count} direct reports")
+                    top_supervisors = supervisor_stats.drop("No Direct Supervisor", errors="ignore").nlargest(10)
+                    for supervisor, count in top_supervisors.items():
+                        st.write(f"• {supervisor}: {count} direct reports")
                 
                 with col2:
                     no_supervisor_count = supervisor_stats.get("No Direct Supervisor", 0)
@@ -376,19 +387,17 @@ with tab3:
     st.subheader("📈 Leave Request Statistics")
     
     try:
-        # Get current year statistics
-        current_year = datetime.now().year
-        year_start = datetime(current_year, 1, 1)
-        
-        # Total requests this year
-        requests_query = db.collection("leave_requests").where("created_at", ">=", year_start).stream()
-        requests_list = [doc.to_dict() for doc in requests_query]
-        
-        if requests_list:
-            total_requests = len(requests_list)
-            approved_requests = len([r for r in requests_list if r.get("status") == "approved_final"])
-            pending_requests = len([r for r in requests_list if r.get("status") == "pending"])
-            rejected_requests = len([r for r in requests_list if r.get("status") == "rejected"])
+        # Counted server-side instead of streaming every request of the year
+        if request_counts is None:
+            st.warning("Leave statistics are unavailable right now.")
+        elif request_counts["total"]:
+            total_requests = request_counts["total"]
+            status_counts = request_counts["by_status"]
+            leave_type_counts = {lt: count for lt, count in request_counts["by_leave_type"].items() if count}
+            
+            approved_requests = status_counts.get("approved_final", 0)
+            pending_requests = status_counts.get("pending", 0)
+            rejected_requests = status_counts.get("rejected", 0)
             
             # Display metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -408,18 +417,13 @@ with tab3:
             # Leave type breakdown
             st.subheader("📋 Leave Type Breakdown")
             
-            leave_type_counts = {}
-            for request in requests_list:
-                leave_type = request.get("leave_type", "unknown")
-                leave_type_counts[leave_type] = leave_type_counts.get(leave_type, 0) + 1
-            
             if leave_type_counts:
                 df_leave_types = pd.DataFrame(
                     list(leave_type_counts.items()),
                     columns=["Leave Type", "Count"]
                 )
                 df_leave_types["Leave Type"] = df_leave_types["Leave Type"].map(
-                    lambda x: LEAVE_TYPES.get(x, {}).get("name", x.title())
+                    lambda x: LEAVE_TYPE_NAMES.get(x, x.title())
                 )
                 
                 st.bar_chart(df_leave_types.set_index("Leave Type"))
@@ -436,24 +440,17 @@ with tab3:
     st.subheader("👥 User Statistics")
     
     try:
-        # Get user counts by access level and supervisor status
-        users_query = db.collection("users_db").stream()
-        users_by_level = {1: 0, 2: 0, 3: 0, 4: 0}
-        active_users = 0
-        users_with_supervisors = 0
+        # Get user counts by access level and supervisor status from one column-wise frame
+        users_df = pd.DataFrame(
+            list(load_users_by_id().values()),
+            columns=["access_level", "is_active", "direct_supervisor_id"]
+        )
         
-        for doc in users_query:
-            user_data_stat = doc.to_dict()
-            access_level = user_data_stat.get("access_level", 4)
-            users_by_level[access_level] = users_by_level.get(access_level, 0) + 1
-            
-            if user_data_stat.get("is_active", True):
-                active_users += 1
-            
-            if user_data_stat.get("direct_supervisor_id"):
-                users_with_supervisors += 1
+        users_by_level = users_df["access_level"].fillna(4).astype(int).value_counts()
+        active_users = int(users_df["is_active"].fillna(True).astype(bool).sum())
+        users_with_supervisors = int(users_df["direct_supervisor_id"].fillna("").astype(bool).sum())
         
-        total_users = sum(users_by_level.values())
+        total_users = len(users_df)
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -474,9 +471,9 @@ with tab3:
         
         col1, col2, col3, col4 = st.columns(4)
         
-        for i, (level, count) in enumerate(users_by_level.items()):
+        for i, (level, level_name) in enumerate(access_level_names.items()):
             with [col1, col2, col3, col4][i]:
-                st.metric(access_level_names[level], count)
+                st.metric(level_name, int(users_by_level.get(level, 0)))
     
     except Exception as e:
         st.error(f"Error loading user statistics: {str(e)}")
@@ -524,9 +521,19 @@ with tab4:
         if st.button("🔄 Refresh Cache", help="Clear system cache and reload data"):
             # Clear Streamlit cache
             st.cache_resource.clear()
+            st.cache_data.clear()
             st.success("Cache cleared successfully!")
     
     with col2:
         if st.button("📊 Generate Reports", help="Generate system reports"):
             st.info("Advanced reporting features coming soon!")
+    
+    if st.button("🧾 Backfill Request Snapshots", help="Store employee and approver details on older leave and overtime requests"):
+        with st.spinner("Backfilling request snapshots..."):
+            results = [backfill_request_user_snapshots(name) for name in ("leave_requests", "overtime_requests")]
+        for result in results:
+            if result["success"]:
+                st.success(f"✅ {result['message']}")
+            else:
+                st.error(f"❌ {result['message']}")
 
@@ -5,7 +5,7 @@ import utils.database as db
 from utils.auth import check_authentication
 from utils.logout_handler import is_authenticated, handle_logout, clear_cookies_js
 from utils.leave_system_db import (
-    LEAVE_TYPES, reset_annual_leave_quotas, get_leave_statistics,
+    LEAVE_TYPE_NAMES, reset_annual_leave_quotas, get_leave_statistics,
     get_employee_leave_quota, get_employee_leave_requests
 )
 
@@ -111,7 +111,7 @@ with tab1:
             col_types = st.columns(len(system_stats['by_leave_type']))
             for i, (leave_type, count) in enumerate(system_stats['by_leave_type'].items()):
                 with col_types[i % len(col_types)]:
-                    leave_name = LEAVE_TYPES.get(leave_type, {}).get('name', leave_type.title())
+                    leave_name = LEAVE_TYPE_NAMES.get(leave_type, leave_type.title())
                     st.metric(leave_name, count)
     
     else:
@@ -431,6 +431,7 @@ with tab4:
 st.sidebar.markdown("### ⚙️ Admin Tools")
 
 if st.sidebar.button("🔄 Refresh Data"):
+    get_leave_statistics.clear()
     st.rerun()
 
 if st.sidebar.button("💾 Backup System"):
@@ -910,16 +910,12 @@ with tab4:
                                 result = delete_employee(st.session_state.selected_employee_id)
                                 
                                 if result["success"]:
-                                    st.success(f"✅ {result['message']}")
-                                    st.balloons()
+                                    st.toast(f"✅ {result['message']}")
                                     
                                     # Clear selection
                                     st.session_state.selected_employee_id = None
                                     st.session_state.show_delete_confirmation = False
                                     
-                                    st.info("Redirecting to user management...")
-                                    import time
-                                    time.sleep(2)
                                     st.rerun()
                                 else:
                                     st.error(f"❌ {result['message']}")
@@ -942,7 +938,7 @@ st.sidebar.markdown("### 👑 Admin Tools")
 try:
     all_employees = get_all_employees()
     active_employees = [emp for emp in all_employees if emp.get("is_active", True)]
-    admin_count = len([emp for emp in all_employees if emp.get("access_level") == 1])
+    admin_count = sum(1 for emp in all_employees if emp.get("access_level") == 1)
     
     st.sidebar.metric("Total Employees", len(all_employees))
     st.sidebar.metric("Active Employees", len(active_employees))
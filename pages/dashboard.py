@@ -1,29 +1,26 @@
 # Enhanced dashboard.py with StreamlitAntdComponents in sidebar
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 import pathlib
+import pandas as pd
 import utils.database as db
-from utils.auth import get_authenticator, check_authentication, logout_user
-from utils.logout_handler import handle_logout, clear_cookies_js, check_logout_status, is_authenticated
-from utils.leave_system_db import (
-    get_employee_leave_quota, get_employee_leave_requests, get_pending_approvals_for_approver,
-    get_employee_overtime_balance, get_employee_overtime_requests, get_pending_overtime_approvals_for_approver
-)
+from utils.database import enrich_user_data
+from utils.auth import get_authenticator, check_authentication, logout_user, AuthState
+from utils.logout_handler import handle_logout, check_logout_status
+from utils.dashboard_cache import cached_dashboard_snapshot
 from utils.secrets_manager import secrets as app_secrets
 
 import streamlit_antd_components as sac
 
 # Check if user just logged out
 if check_logout_status():
-    st.success("Anda Berhasil Log out dari akun Anda!")
-    st.info("Mengarahkan ke laman login...")
-    import time
-    time.sleep(1)
+    st.toast("Anda Berhasil Log out dari akun Anda!", icon="✅")
     st.switch_page("pages/login.py")
 
 # Initialize authentication check with error handling
 try:
-    authenticator = check_authentication()
+    auth_state = check_authentication()
 except Exception as e:
     st.error(f"Authentication system error: {e}")
     st.info("Coba refresh laman ini atau pergi ke laman login.")
@@ -32,22 +29,25 @@ except Exception as e:
         st.switch_page("pages/login.py")
     st.stop()
 
-# Use the logout handler's authentication check
-if not is_authenticated():
+if auth_state is not AuthState.AUTHENTICATED:
     st.warning("Anda harus masuk terlebih dahulu.")
     if st.button("Go to Login Page"):
         st.switch_page("pages/login.py")
     st.stop()
 
+@st.cache_data(ttl=300, show_spinner=False)
+def load_user(username):
+    """Fetch and enrich a user's profile once per username"""
+    user_data = db.fetch_user_by_username(username)
+    return enrich_user_data(user_data) if user_data else None
+
 # Get user data
 username = st.session_state.get("username")
 
 # Ensure user data is loaded
 if "user_data" not in st.session_state and username:
-    user_data = db.fetch_user_by_username(username)
+    user_data = load_user(username)
     if user_data:
-        from utils.database import enrich_user_data
-        user_data = enrich_user_data(user_data)
         st.session_state.user_data = user_data
     else:
         st.error("Pengguna tidak ditemukan. Jika menurut Anda ini adalah kesalahan, silakan hubungi tim IT (data@rhayaflicks.com)")
@@ -65,42 +65,113 @@ user_data = st.session_state["user_data"]
 employee_id = user_data.get("employee_id")
 access_level = user_data.get("access_level", 4)
 
+# Read the clock once per rerun (timezone-aware local time)
+_now = datetime.now().astimezone()
+_now_str = _now.strftime('%Y-%m-%d %H:%M:%S')
+current_month = _now.strftime("%Y-%m")
+
+# Normalize the joining date to a UTC-aware datetime once per session
+start_joining_date = user_data.get("start_joining_date")
+if not isinstance(start_joining_date, datetime) and hasattr(start_joining_date, "timestamp"):
+    start_joining_date = datetime.fromtimestamp(start_joining_date.timestamp(), tz=timezone.utc)
+if isinstance(start_joining_date, datetime) and start_joining_date.tzinfo is None:
+    start_joining_date = start_joining_date.replace(tzinfo=timezone.utc)
+user_data["start_joining_date"] = start_joining_date
+
+# Access levels with approval responsibilities (admin, HR, division head)
+_MANAGER_LEVELS = frozenset({1, 2, 3})
+
+IS_MANAGER = access_level in _MANAGER_LEVELS
+IS_ADMIN = access_level == 1
+
 # --- Helper functions ---
 def format_date(dt):
-    try:
-        return dt.strftime("%d %B %Y")
-    except Exception:
-        return str(dt)
+    return dt.strftime("%d %B %Y")
 
 def service_duration(start_date):
-    today = datetime.utcnow()
-    if hasattr(start_date, "timestamp"):
-        start_date = datetime.fromtimestamp(start_date.timestamp())
-    delta = today - start_date
-    return f"{delta.days} days"
+    return f"{(_now - start_date).days} days"
 
 # Get leave and overtime data for notifications
-leave_quota = get_employee_leave_quota(employee_id) if employee_id else None
-recent_leave_requests = get_employee_leave_requests(employee_id, limit=5) if employee_id else []
-pending_leave_requests = len([r for r in recent_leave_requests if r.get("status") == "pending"])
+snapshot = cached_dashboard_snapshot(employee_id, current_month, access_level) if employee_id else {}
+
+leave_quota = snapshot.get("leave_quota")
+recent_leave_requests = snapshot.get("recent_leave_requests", [])
+pending_leave_requests = snapshot.get("pending_leave_requests", 0)
 
-current_month = datetime.now().strftime("%Y-%m")
-overtime_balance = get_employee_overtime_balance(employee_id, current_month) if employee_id else None
-recent_overtime_requests = get_employee_overtime_requests(employee_id, limit=5) if employee_id else []
-pending_overtime_requests = len([r for r in recent_overtime_requests if r.get("status") == "pending"])
+overtime_balance = snapshot.get("overtime_balance")
+recent_overtime_requests = snapshot.get("recent_overtime_requests", [])
+pending_overtime_requests = snapshot.get("pending_overtime_requests", 0)
 
-# For managers, get pending approvals
+# For managers, pending approval counts
 pending_leave_approvals = 0
 pending_overtime_approvals = 0
-if access_level in [1, 2, 3]:
-    pending_leave_approvals_list = get_pending_approvals_for_approver(employee_id) if employee_id else []
-    pending_leave_approvals = len(pending_leave_approvals_list)
+if IS_MANAGER:
+    pending_leave_approvals = snapshot.get("pending_leave_approvals", 0)
+    pending_overtime_approvals = snapshot.get("pending_overtime_approvals", 0)
+
+@lru_cache(maxsize=32)
+def _pending_summary_messages(leave, overtime):
+    """Format the pending-approval strings once per pair of counts"""
+    total = leave + overtime
+    return {
+        "total": total,
+        "notice": f"👥 Manager Alert: {total} requests need your approval",
+        "main": f"You have **{total}** requests waiting for your approval.",
+        "leave": f"📋 **{leave}** leave requests pending",
+        "overtime": f"⏰ **{overtime}** overtime requests pending"
+    }
+
+def render_pending_summary(leave, overtime, context):
+    """Pending-approval summary for managers; 'notice' returns a (type, message) notice, 'main' renders the section"""
+    messages = _pending_summary_messages(leave, overtime)
     
-    pending_overtime_approvals_list = get_pending_overtime_approvals_for_approver(employee_id) if employee_id else []
-    pending_overtime_approvals = len(pending_overtime_approvals_list)
+    if context == "notice":
+        if messages["total"] > 0:
+            return ("warning", messages["notice"])
+        return None
+    
+    st.subheader("⚡ Pending Approvals")
+    
+    if messages["total"] > 0:
+        st.warning(messages["main"])
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if leave > 0:
+                st.error(messages["leave"])
+                st.page_link("pages/leave_approval.py", label="📋 Review Leave Requests")
+        
+        with col2:
+            if overtime > 0:
+                st.error(messages["overtime"])
+                st.page_link("pages/overtime_approval.py", label="⏰ Review Overtime Requests")
+    else:
+        st.success("✅ All caught up! No pending approvals.")
 
 # === Modern Sidebar Navigation with StreamlitAntdComponents ===
 
+# Static sidebar content emitted as a single element (dividers + quick tips)
+_SIDEBAR_HTML = """
+<hr>
+<details>
+<summary>💡 Quick Tips</summary>
+<b>Leave Tips:</b>
+<ul>
+<li>Plan leave in advance</li>
+<li>Check team calendar</li>
+<li>Submit before deadlines</li>
+</ul>
+<b>Overtime Tips:</b>
+<ul>
+<li>Only weekends/holidays</li>
+<li>Submit weekly</li>
+<li>Check balance regularly</li>
+</ul>
+</details>
+<hr>
+"""
+
 def create_nav_menu(access_level, pending_leave_approvals, pending_overtime_approvals, pending_leave_requests, pending_overtime_requests):
     """Create navigation menu items with badges for pending items"""
     
@@ -138,7 +209,7 @@ def create_nav_menu(access_level, pending_leave_approvals, pending_overtime_appr
                                      children=overtime_children))
     
     # Add management section for supervisors and managers
-    if access_level in [1, 2, 3]:
+    if access_level in _MANAGER_LEVELS:
         total_approvals = pending_leave_approvals + pending_overtime_approvals
         approval_children = [
             sac.MenuItem('Leave Approvals', icon='check-circle-fill'),
@@ -170,9 +241,9 @@ def create_nav_menu(access_level, pending_leave_approvals, pending_overtime_appr
     return menu_items
 
 # -- Sidebar with StreamlitAntdComponents --
-with st.sidebar:
-    
-    
+@st.fragment
+def render_sidebar():
+    """Render the navigation menu; menu clicks only rerun this fragment"""
     # Modern navigation menu with StreamlitAntdComponents
     menu_items = create_nav_menu(access_level, pending_leave_approvals, pending_overtime_approvals, 
                                 pending_leave_requests, pending_overtime_requests)
@@ -184,57 +255,42 @@ with st.sidebar:
         indent=20,
         open_all=False,
         return_index=False,
+        key="dashboard_menu",
         # color='#0D2A52'
         color='#ffffff'
     )
     
-    st.markdown("---")
-    
-    
-    
-    st.markdown("---")
-    
-    
-    # Quick tips
-    with st.expander("💡 Quick Tips"):
-        st.markdown("""
-        **Leave Tips:**
-        - Plan leave in advance
-        - Check team calendar
-        - Submit before deadlines
-
-        **Overtime Tips:**
-        - Only weekends/holidays
-        - Submit weekly
-        - Check balance regularly
-        """)
-
-# Handle navigation actions
-if selected_menu:
-    if selected_menu == 'Profile':
-        st.switch_page("pages/profile.py")
-    elif selected_menu == 'Request Leave':
-        st.switch_page("pages/leave_request.py")
-    elif selected_menu == 'Request Overtime':
-        st.switch_page("pages/overtime_management.py")
-    elif selected_menu == 'Leave Approvals':
-        st.switch_page("pages/leave_approval.py")
-    elif selected_menu == 'Overtime Approvals':
-        st.switch_page("pages/overtime_approval.py")
-    elif selected_menu == 'User Management':
-        st.switch_page("pages/admin_user_management.py")
-    elif selected_menu == 'Leave Control':
-        st.switch_page("pages/admin_leave_control.py")
-    elif selected_menu == 'Admin Panel':
-        st.switch_page("pages/admin_control.py")
-    elif selected_menu == 'Change Password':
-        st.switch_page("pages/password_management.py")
-    elif selected_menu == 'Logout':
-        # Handle logout
-        handle_logout()
-        st.success("Anda Berhasil Log out dari akun Anda!")
-        st.markdown(clear_cookies_js(), unsafe_allow_html=True)
-        st.stop()
+    # Handle navigation actions
+    if selected_menu:
+        if selected_menu == 'Profile':
+            st.switch_page("pages/profile.py")
+        elif selected_menu == 'Request Leave':
+            st.switch_page("pages/leave_request.py")
+        elif selected_menu == 'Request Overtime':
+            st.switch_page("pages/overtime_management.py")
+        elif selected_menu == 'Leave Approvals':
+            st.switch_page("pages/leave_approval.py")
+        elif selected_menu == 'Overtime Approvals':
+            st.switch_page("pages/overtime_approval.py")
+        elif selected_menu == 'User Management':
+            st.switch_page("pages/admin_user_management.py")
+        elif selected_menu == 'Leave Control':
+            st.switch_page("pages/admin_leave_control.py")
+        elif selected_menu == 'Admin Panel':
+            st.switch_page("pages/admin_control.py")
+        elif selected_menu == 'Change Password':
+            st.switch_page("pages/password_management.py")
+        elif selected_menu == 'Logout':
+            # Handle logout
+            handle_logout()
+            # Rerun the whole app, not just this fragment, so the dashboard content is cleared
+            # and the logout check at the top of the page redirects to login
+            st.rerun()
+
+with st.sidebar:
+    render_sidebar()
+    # Static content stays outside the fragment so menu clicks don't re-send it
+    st.markdown(_SIDEBAR_HTML, unsafe_allow_html=True)
 
 # === Main Dashboard Content ===
 st.subheader(f"Selamat datang, {user_data.get('name', 'Unknown')}!")
@@ -246,23 +302,19 @@ with col1:
     st.image("assets/profile-placeholder-square.jpg", use_container_width=True)
 
 with col2:
-    st.markdown(f"""
-        <div style="font-size: 0.75rem; color: gray;">Nama</div>
-        <div style="font-size: 1rem; margin-bottom: 4px;">{user_data['name']}</div>
-        <hr style="border: none; border-top: 1px solid #ddd; margin: 8px 0;" />
-
-        <div style="font-size: 0.75rem; color: gray;">Posisi</div>
-        <div style="font-size: 1rem; margin-bottom: 4px;">{user_data['role_name']} ({user_data['division_name']})</div>
-        <hr style="border: none; border-top: 1px solid #ddd; margin: 8px 0;" />
-
-        <div style="font-size: 0.75rem; color: gray;">Email</div>
-        <div style="font-size: 1rem; margin-bottom: 4px;">{user_data['email']}</div>
-        <hr style="border: none; border-top: 1px solid #ddd; margin: 8px 0;" />
-
-        <div style="font-size: 0.75rem; color: gray;">Bergabung Sejak</div>
-        <div style="font-size: 1rem; margin-bottom: 4px;">{format_date(user_data['start_joining_date'])} ({service_duration(user_data['start_joining_date'])})</div>
-
-    """, unsafe_allow_html=True)
+    joined_str = format_date(user_data['start_joining_date'])
+    service_str = service_duration(user_data['start_joining_date'])
+    profile_fields = [
+        ("Nama", user_data['name']),
+        ("Posisi", f"{user_data['role_name']} ({user_data['division_name']})"),
+        ("Email", user_data['email']),
+        ("Bergabung Sejak", f"{joined_str} ({service_str})")
+    ]
+    for i, (label, value) in enumerate(profile_fields):
+        st.caption(label)
+        st.write(value)
+        if i < len(profile_fields) - 1:
+            st.divider()
 
 st.divider()
 
@@ -272,16 +324,13 @@ st.subheader("🚀 Quick Actions")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    if st.button("📋 Ajukan Cuti", use_container_width=True):
-        st.switch_page("pages/leave_request.py")
+    st.page_link("pages/leave_request.py", label="📋 Ajukan Cuti", use_container_width=True)
 
 with col2:
-    if st.button("⏰ Ajukan Lembur", use_container_width=True):
-        st.switch_page("pages/overtime_management.py")
+    st.page_link("pages/overtime_management.py", label="⏰ Ajukan Lembur", use_container_width=True)
 
 with col3:
-    if st.button("👤 My Profile", use_container_width=True):
-        st.switch_page("pages/profile.py")
+    st.page_link("pages/profile.py", label="👤 My Profile", use_container_width=True)
 
 # Enhanced Stats Summary
 col1, col2, col3, col4 = st.columns(4)
@@ -331,60 +380,64 @@ with col4:
     )
 
 # Important Notices
-notices = []
-
-# Check if leave quota is running low
-if leave_quota and leave_remaining <= 3:
-    notices.append({
-        "type": "warning",
-        "message": f"⚠️ Low leave balance: Only {leave_remaining} days remaining this year"
-    })
-
-# Check for pending leave requests
-if pending_leave_requests > 0:
-    notices.append({
-        "type": "info", 
-        "message": f"📋 You have {pending_leave_requests} leave request(s) pending approval"
-    })
-
-# Check for pending overtime requests
-if pending_overtime_requests > 0:
-    notices.append({
-        "type": "info", 
-        "message": f"⏰ You have {pending_overtime_requests} overtime request(s) pending approval"
-    })
-
-# Check overtime balance
-if overtime_balance and overtime_balance_hours > 20:
-    notices.append({
-        "type": "info",
-        "message": f"💰 High overtime balance: {overtime_balance_hours:.1f} hours ready for payroll"
-    })
-
-# Manager notices
-if access_level in [1, 2, 3] and (pending_leave_approvals > 0 or pending_overtime_approvals > 0):
-    notices.append({
-        "type": "warning",
-        "message": f"👥 Manager Alert: {pending_leave_approvals + pending_overtime_approvals} requests need your approval"
-    })
+# Each check returns a (type, message) tuple, or None when it doesn't apply
+def _low_leave_notice():
+    if leave_quota and leave_remaining <= 3:
+        return ("warning", f"⚠️ Low leave balance: Only {leave_remaining} days remaining this year")
+
+def _pending_leave_notice():
+    if pending_leave_requests > 0:
+        return ("info", f"📋 You have {pending_leave_requests} leave request(s) pending approval")
+
+def _pending_overtime_notice():
+    if pending_overtime_requests > 0:
+        return ("info", f"⏰ You have {pending_overtime_requests} overtime request(s) pending approval")
+
+def _high_overtime_notice():
+    if overtime_balance and overtime_balance_hours > 20:
+        return ("info", f"💰 High overtime balance: {overtime_balance_hours:.1f} hours ready for payroll")
+
+def _manager_notice():
+    if IS_MANAGER:
+        return render_pending_summary(pending_leave_approvals, pending_overtime_approvals, "notice")
+
+notices = [
+    notice for notice in (
+        _low_leave_notice(),
+        _pending_leave_notice(),
+        _pending_overtime_notice(),
+        _high_overtime_notice(),
+        _manager_notice()
+    )
+    if notice is not None
+]
 
 # Display notices
+_NOTICE_DISPATCH = {"warning": st.warning, "error": st.error, "info": st.info}
+
 if notices:
     st.subheader("📢 Important Notices")
-    for notice in notices:
-        if notice["type"] == "warning":
-            st.warning(notice["message"])
-        elif notice["type"] == "error":
-            st.error(notice["message"])
-        else:
-            st.info(notice["message"])
+    for notice_type, message in notices:
+        _NOTICE_DISPATCH[notice_type](message)
 
 # Status Overview with tabs
 st.subheader("Status Overview")
 
-tab1, tab2 = st.tabs(["📋 Status Cuti", "⏰ Status Lembur"])
+_STATUS_BADGES = {
+    "pending": "🕐 Pending",
+    "approved": "✅ Approved",
+    "approved_final": "✅ Approved",
+    "rejected": "❌ Rejected"
+}
 
-with tab1:
+def _status_badge(status):
+    """Emoji label for a leave/overtime status"""
+    return _STATUS_BADGES.get(status, "📋 Processing")
+
+_STATUS_COLUMN = st.column_config.TextColumn("Status", width="small")
+
+def _render_leave_tab():
+    """Render leave balance and recent leave requests"""
     st.markdown("### 📋 Leave Balance")
     
     if leave_quota:
@@ -417,33 +470,24 @@ with tab1:
     if recent_leave_requests:
         st.markdown("### 📋 Recent Leave Requests")
         
-        for request in recent_leave_requests[:3]:
-            with st.container():
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    leave_type_name = request.get('leave_type', 'Unknown').title()
-                    st.write(f"**{leave_type_name} Leave**")
-                    st.caption(f"{request.get('start_date')} to {request.get('end_date')}")
-                
-                with col2:
-                    st.write(f"{request.get('working_days', 0)} days")
-                
-                with col3:
-                    status = request.get('status', 'unknown')
-                    if status == 'pending':
-                        st.warning("🕐 Pending")
-                    elif status == 'approved_final':
-                        st.success("✅ Approved")
-                    elif status == 'rejected':
-                        st.error("❌ Rejected")
-                    else:
-                        st.info("📋 Processing")
+        leave_rows = [
+            {
+                "Type": f"{request.get('leave_type', 'Unknown').title()} Leave",
+                "From": request.get('start_date'),
+                "To": request.get('end_date'),
+                "Days": request.get('working_days', 0),
+                "Status": _status_badge(request.get('status'))
+            }
+            for request in recent_leave_requests[:3]
+        ]
+        st.dataframe(pd.DataFrame(leave_rows), hide_index=True, use_container_width=True,
+                     column_config={"Status": _STATUS_COLUMN})
         
         if len(recent_leave_requests) > 3:
             st.info(f"... and {len(recent_leave_requests) - 3} more requests")
 
-with tab2:
+def _render_overtime_tab():
+    """Render overtime balance and recent overtime requests"""
     st.markdown("### ⏰ Overtime Balance")
     
     if overtime_balance:
@@ -469,67 +513,54 @@ with tab2:
     if recent_overtime_requests:
         st.markdown("### ⏰ Recent Overtime Requests")
         
-        for request in recent_overtime_requests[:3]:
-            with st.container():
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    week_start = request.get('week_start', '')
-                    week_end = request.get('week_end', '')
-                    st.write(f"**Week Overtime**")
-                    st.caption(f"{week_start} to {week_end}")
-                
-                with col2:
-                    st.write(f"{request.get('total_hours', 0):.1f}h")
-                
-                with col3:
-                    status = request.get('status', 'unknown')
-                    if status == 'pending':
-                        st.warning("🕐 Pending")
-                    elif status == 'approved':
-                        st.success("✅ Approved")
-                    elif status == 'rejected':
-                        st.error("❌ Rejected")
-                    else:
-                        st.info("📋 Processing")
+        overtime_rows = [
+            {
+                "Type": "Week Overtime",
+                "From": request.get('week_start', ''),
+                "To": request.get('week_end', ''),
+                "Hours": f"{request.get('total_hours', 0):.1f}h",
+                "Status": _status_badge(request.get('status'))
+            }
+            for request in recent_overtime_requests[:3]
+        ]
+        st.dataframe(pd.DataFrame(overtime_rows), hide_index=True, use_container_width=True,
+                     column_config={"Status": _STATUS_COLUMN})
         
         if len(recent_overtime_requests) > 3:
             st.info(f"... and {len(recent_overtime_requests) - 3} more requests")
 
-# Manager Dashboard for access levels 1-3
-if access_level in [1, 2, 3]:
-    st.subheader("⚡ Pending Approvals")
-    
-    total_pending = pending_leave_approvals + pending_overtime_approvals
+@st.fragment
+def render_status_tabs():
+    """Render only the selected status section; switching reruns just this fragment"""
+    active_tab = sac.segmented(
+        items=[sac.SegmentedItem(label='📋 Status Cuti'), sac.SegmentedItem(label='⏰ Status Lembur')],
+        index=st.session_state.get("dashboard_tab_idx", 0),
+        return_index=True,
+        use_container_width=True,
+        key="dashboard_tab"
+    )
+    st.session_state.dashboard_tab_idx = active_tab
     
-    if total_pending > 0:
-        st.warning(f"You have **{total_pending}** requests waiting for your approval.")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if pending_leave_approvals > 0:
-                st.error(f"📋 **{pending_leave_approvals}** leave requests pending")
-                if st.button("📋 Review Leave Requests", type="primary"):
-                    st.switch_page("pages/leave_approval.py")
-        
-        with col2:
-            if pending_overtime_approvals > 0:
-                st.error(f"⏰ **{pending_overtime_approvals}** overtime requests pending")
-                if st.button("⏰ Review Overtime Requests", type="primary"):
-                    st.switch_page("pages/overtime_approval.py")
+    if active_tab == 0:
+        _render_leave_tab()
     else:
-        st.success("✅ All caught up! No pending approvals.")
+        _render_overtime_tab()
+
+render_status_tabs()
+
+# Manager Dashboard for access levels 1-3
+if IS_MANAGER:
+    render_pending_summary(pending_leave_approvals, pending_overtime_approvals, "main")
 
 # Footer
 st.markdown("---")
 st.caption("🏢 Enhanced Employee Management System | Leave & Overtime Management")
-st.caption(f"Session: {user_data.get('name')} | Access Level: {access_level} | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+st.caption(f"Session: {user_data.get('name')} | Access Level: {access_level} | {_now_str}")
 
 # Show different footer messages based on access level
-if access_level == 1:
+if IS_ADMIN:
     st.caption("🔑 Administrator: Full system access with override capabilities")
-elif access_level in [2, 3]:
+elif IS_MANAGER:
     st.caption("👥 Manager: Team approval and oversight responsibilities") 
 else:
     st.caption("👤 Employee: Submit requests and track your leave & overtime")
\ No newline at end of file
@@ -1,13 +1,15 @@
 # Enhanced leave_approval.py with dialog details and individual selection
 import streamlit as st
+import html
 from datetime import datetime
 import utils.database as db
 from utils.auth import check_authentication
 from utils.logout_handler import is_authenticated, handle_logout, clear_cookies_js
 from utils.leave_system_db import (
-    LEAVE_TYPES, DIVISIONS, get_pending_approvals_for_approver, 
+    LEAVE_TYPES, LEAVE_TYPE_NAMES, DIVISIONS, get_pending_approvals_for_approver, 
     approve_leave_request, reject_leave_request, get_employee_leave_quota,
-    get_team_members, get_approval_chain
+    get_team_members, get_approval_chain, get_user_doc, get_leave_quotas_by_ids,
+    get_admin_quick_stats, get_query_executor, bulk_process_leave_requests, get_users_by_ids
 )
 import pandas as pd
 from utils.firebase_storage import display_file_attachment
@@ -47,12 +49,48 @@ if "show_employee_dialog" not in st.session_state:
 if "dialog_employee_id" not in st.session_state:
     st.session_state.dialog_employee_id = None
 
+# Supervisor name stored on the request, if it has one, so the dialog can skip that lookup
+if "dialog_supervisor_name" not in st.session_state:
+    st.session_state.dialog_supervisor_name = None
+
+# Open confirmation per request id: "approve", "reject" or "quick_reject"
+if "leave_confirm" not in st.session_state:
+    st.session_state.leave_confirm = {}
+
+# Requests this session approved/rejected, hidden from the cached pending list right away
+if "processed_leave_ids" not in st.session_state:
+    st.session_state.processed_leave_ids = set()
+
+# Quick approvals waiting to be written together in one batch
+if "queued_leave_approvals" not in st.session_state:
+    st.session_state.queued_leave_approvals = set()
+
+# Request open in the detail panel, and the row ids the pending table was drawn with
+if "selected_leave_request_id" not in st.session_state:
+    st.session_state.selected_leave_request_id = None
+
+if "pending_leave_row_ids" not in st.session_state:
+    st.session_state.pending_leave_row_ids = []
+
+# User docs of pending requesters and their supervisors, prefetched for the details dialog
+EMPLOYEE_DIALOG_FIELDS = [
+    "name", "email", "division_name", "role_name", "access_level", "phone_number",
+    "employee_status", "start_joining_date", "direct_supervisor_id"
+]
+
+if "pending_employee_docs" not in st.session_state:
+    st.session_state.pending_employee_docs = {}
+
 @st.dialog("Employee Details")
 def show_employee_details():
     if st.session_state.dialog_employee_id:
         try:
-            # Get employee data
-            employee_data = db.db.collection("users_db").document(st.session_state.dialog_employee_id).get().to_dict()
+            # Quota lookup runs alongside the employee/supervisor reads
+            quota_future = get_query_executor().submit(get_employee_leave_quota, st.session_state.dialog_employee_id)
+            
+            # Get employee data, prefetched with the pending list when possible
+            employee_docs = st.session_state.pending_employee_docs
+            employee_data = employee_docs.get(st.session_state.dialog_employee_id) or get_user_doc(st.session_state.dialog_employee_id)
             
             if employee_data:
                 st.markdown(f"### 👤 {employee_data.get('name', 'Unknown')}")
@@ -67,7 +105,7 @@ def show_employee_details():
                 
                 with col2:
                     # Get leave quota
-                    leave_quota = get_employee_leave_quota(st.session_state.dialog_employee_id)
+                    leave_quota = quota_future.result()
                     
                     if leave_quota:
                         annual_quota = leave_quota.get("annual_quota", 14)
@@ -84,15 +122,17 @@ def show_employee_details():
                 
                 # Additional info
                 join_date = employee_data.get('start_joining_date')
-                if join_date and hasattr(join_date, 'timestamp'):
-                    join_str = datetime.fromtimestamp(join_date.timestamp()).strftime('%d %B %Y')
+                join_str = db.format_timestamp(join_date, '%d %B %Y', None)
+                if join_str:
                     st.write(f"**📅 Joined:** {join_str}")
                 
-                # Supervisor info
+                # Supervisor info, from the request's stored snapshot when available
                 supervisor_id = employee_data.get("direct_supervisor_id")
-                if supervisor_id:
+                if st.session_state.dialog_supervisor_name:
+                    st.write(f"**👥 Supervisor:** {st.session_state.dialog_supervisor_name}")
+                elif supervisor_id:
                     try:
-                        supervisor_data = db.db.collection("users_db").document(supervisor_id).get().to_dict()
+                        supervisor_data = employee_docs.get(supervisor_id) or get_user_doc(supervisor_id)
                         if supervisor_data:
                             st.write(f"**👥 Supervisor:** {supervisor_data.get('name', 'Unknown')}")
                     except:
@@ -113,6 +153,7 @@ def show_employee_details():
     if st.button("Close", type="primary"):
         st.session_state.show_employee_dialog = False
         st.session_state.dialog_employee_id = None
+        st.session_state.dialog_supervisor_name = None
         st.rerun()
 
 # Page header
@@ -151,11 +192,283 @@ st.divider()
 if st.session_state.show_employee_dialog:
     show_employee_details()
 
+def toggle_leave_selection(request_id):
+    """Sync a request's bulk-selection checkbox into session state"""
+    if st.session_state[f"select_leave_{request_id}"]:
+        st.session_state.selected_leave_requests.add(request_id)
+    else:
+        st.session_state.selected_leave_requests.discard(request_id)
+
+@st.fragment
+def render_request(request):
+    """Render one pending leave request; its own widgets only rerun this block"""
+    request_id = request["id"]
+    confirm = st.session_state.leave_confirm
+    
+    # Values reused throughout the panel, looked up once
+    employee_name = request.get('employee_name', 'Unknown')
+    leave_type_name = LEAVE_TYPE_NAMES.get(request['leave_type'], 'Unknown')
+    working_days = request.get('working_days', 0)
+    
+    with st.container():
+        # Checkbox and header
+        col_check, col_header1, col_header2 = st.columns([0.5, 2.5, 1])
+        
+        with col_check:
+            # The callback records the selection before the fragment reruns, no extra full rerun
+            st.checkbox(
+                "",
+                value=request_id in st.session_state.selected_leave_requests,
+                key=f"select_leave_{request_id}",
+                label_visibility="collapsed",
+                on_change=toggle_leave_selection,
+                args=(request_id,)
+            )
+        
+        with col_header1:
+            st.markdown(f"#### 📝 {employee_name}")
+            st.markdown(f"**{leave_type_name}** - {request['start_date']} to {request['end_date']}")
+        
+        with col_header2:
+            st.metric("Days", f"{working_days}")
+
+        # Basic info and actions
+        col1, col2, col3 = st.columns([2, 1, 1])
+        
+        with col1:
+            st.markdown(f"**👤 Employee:** {employee_name}")
+            st.markdown(f"**📅 Period:** {request['start_date']} to {request['end_date']}")
+            
+            # Show employee details button
+            if st.button(f"🔍 View Details", key=f"details_leave_{request['id']}"):
+                st.session_state.dialog_employee_id = request.get('employee_id')
+                st.session_state.dialog_supervisor_name = request.get('employee_supervisor_name')
+                st.session_state.show_employee_dialog = True
+                st.rerun()
+        
+        with col2:
+            submitted_date = request.get('submitted_at')
+            submitted_str = db.format_timestamp(submitted_date, '%d %b %Y')
+            st.markdown(f"**📤 Submitted:** {submitted_str}")
+            st.markdown(f"**⏰ Status:** 🕐 Pending")
+        
+        with col3:
+            st.markdown("**🎯 Quick Actions:**")
+            
+            col_quick1, col_quick2 = st.columns(2)
+            
+            with col_quick1:
+                queued = request_id in st.session_state.queued_leave_approvals
+                if st.button("⏳" if queued else "✅", key=f"quick_approve_leave_{request['id']}", help="Queued for approval" if queued else "Quick Approve", disabled=queued):
+                    # Queued and written with the others in one batch when the queue is applied
+                    st.session_state.queued_leave_approvals.add(request_id)
+                    st.toast(f"⏳ Queued approval for {employee_name}")
+                    st.rerun()
+            
+            with col_quick2:
+                if st.button("❌", key=f"quick_reject_leave_{request['id']}", help="Quick Reject"):
+                    confirm[request_id] = "quick_reject"
+
+        # Quick reject reason
+        if confirm.get(request_id) == "quick_reject":
+            quick_reason = st.text_input(
+                "Rejection reason:",
+                key=f"reason_leave_{request['id']}",
+                placeholder="Provide reason for rejection"
+            )
+            
+            col_confirm, col_cancel = st.columns(2)
+            with col_confirm:
+                if st.button("Confirm Reject", key=f"confirm_reject_leave_{request['id']}"):
+                    if quick_reason.strip():
+                        result = reject_leave_request(request['id'], employee_id, quick_reason)
+                        if result['success']:
+                            st.toast("❌ Rejected!")
+                            confirm.pop(request_id, None)
+                            st.session_state.processed_leave_ids.add(request_id)
+                            st.rerun()
+                        else:
+                            st.error(result['message'])
+                    else:
+                        st.error("Please provide a reason")
+            
+            with col_cancel:
+                if st.button("Cancel", key=f"cancel_reject_leave_{request['id']}"):
+                    confirm.pop(request_id, None)
+                    st.rerun(scope="fragment")
+
+        # Leave request details in clean format
+        st.markdown("**📋 Leave Request Details:**")
+        
+        with st.container():
+            col_type, col_reason = st.columns([1, 2])
+            
+            with col_type:
+                st.write(f"**Type:** {leave_type_name}")
+                st.write(f"**Duration:** {working_days} working days")
+            
+            with col_reason:
+                if request.get('reason'):
+                    st.write(f"**Reason:** {request['reason']}")
+                
+                if request.get('emergency_contact'):
+                    st.write(f"**Emergency Contact:** {request['emergency_contact']}")
+                
+                if request.get("attachment"):
+                    st.markdown("**📎 Attachments:**")
+                    attachment_data = request["attachment"]
+                    
+                    if isinstance(attachment_data, dict) and attachment_data.get("file_path"):
+                        display_file_attachment(
+                            attachment_data.get("file_path"), 
+                            attachment_data
+                        )
+                    else:
+                        st.caption(f"📎 {attachment_data}")
+
+        st.markdown("---")
+        
+        # Detailed approval actions
+        with st.expander(f"⚙️ Detailed Actions - {employee_name}"):
+            # Employee leave balance (for annual leave)
+            if request['leave_type'] == 'annual':
+                # Reuse the balance across this panel's own reruns (typing comments, opening prompts)
+                quota_cache = st.session_state.leave_quota_cache
+                if request['employee_id'] not in quota_cache:
+                    quota_cache[request['employee_id']] = get_employee_leave_quota(request['employee_id'])
+                employee_quota = quota_cache[request['employee_id']]
+                if employee_quota:
+                    st.markdown("**📊 Employee Leave Balance:**")
+                    
+                    col_a, col_b, col_c, col_d = st.columns(4)
+                    
+                    with col_a:
+                        st.metric("Quota", f"{employee_quota.get('annual_quota', 14)} days")
+                    with col_b:
+                        st.metric("Used", f"{employee_quota.get('annual_used', 0)} days")
+                    with col_c:
+                        pending = employee_quota.get('annual_pending', 0)
+                        st.metric("Pending", f"{pending} days")
+                    with col_d:
+                        remaining = (employee_quota.get('annual_quota', 14) - 
+                                   employee_quota.get('annual_used', 0) - 
+                                   pending)
+                        st.metric("Available", f"{remaining} days")
+                    
+                    # Warning if request exceeds available balance
+                    if working_days > remaining:
+                        st.error(f"⚠️ **Warning:** This request ({working_days} days) exceeds available balance ({remaining} days)")
+                    
+                    st.markdown("---")
+            
+            # Create unique keys for each request
+            approve_key = f"approve_leave_{request['id']}"
+            reject_key = f"reject_leave_{request['id']}"
+            comments_key = f"comments_leave_{request['id']}"
+            
+            # Comments field
+            approval_comments = st.text_area(
+                "💬 Comments (Optional)",
+                key=comments_key,
+                placeholder="Add any comments for the employee...",
+                help="Comments will be visible to the employee",
+                max_chars=500
+            )
+            
+            # Action buttons
+            col_approve, col_reject, col_info = st.columns([1, 1, 2])
+            
+            with col_approve:
+                if st.button(f"✅ Approve", key=approve_key, type="primary", use_container_width=True):
+                    confirm[request_id] = "approve"
+            
+            with col_reject:
+                if st.button(f"❌ Reject", key=reject_key, type="secondary", use_container_width=True):
+                    confirm[request_id] = "reject"
+            
+            with col_info:
+                st.info("💡 Review carefully before deciding")
+
+            # Handle approval confirmation
+            if confirm.get(request_id) == "approve":
+                st.warning("⚠️ **CONFIRM APPROVAL**")
+                st.write(f"Approve {working_days} days of {leave_type_name} for {employee_name}?")
+                
+                col_yes, col_no = st.columns(2)
+                
+                with col_yes:
+                    if st.button(f"🟢 Yes, Approve", key=f"yes_approve_leave_{request['id']}", type="primary"):
+                        result = approve_leave_request(request['id'], employee_id, approval_comments)
+                        
+                        if result['success']:
+                            st.toast(f"✅ {result['message']}")
+                            
+                            # Clear confirmation state
+                            confirm.pop(request_id, None)
+                            st.session_state.processed_leave_ids.add(request_id)
+                            
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {result['message']}")
+                
+                with col_no:
+                    if st.button(f"🔴 Cancel", key=f"cancel_approve_leave_{request['id']}"):
+                        confirm.pop(request_id, None)
+                        st.rerun(scope="fragment")
+
+            # Handle rejection confirmation
+            if confirm.get(request_id) == "reject":
+                st.warning("⚠️ **CONFIRM REJECTION**")
+                st.write(f"Reject {leave_type_name} request from {employee_name}?")
+                
+                # Require comments for rejection
+                if not approval_comments.strip():
+                    st.error("📝 Please provide a reason for rejection in the comments field above.")
+                else:
+                    col_yes, col_no = st.columns(2)
+                    
+                    with col_yes:
+                        if st.button(f"🔴 Yes, Reject", key=f"yes_reject_leave_{request['id']}", type="secondary"):
+                            result = reject_leave_request(request['id'], employee_id, approval_comments)
+                            
+                            if result['success']:
+                                st.toast(f"✅ {result['message']}")
+                                
+                                confirm.pop(request_id, None)
+                                st.session_state.processed_leave_ids.add(request_id)
+                                
+                                st.rerun()
+                            else:
+                                st.error(f"❌ {result['message']}")
+                    
+                    with col_no:
+                        if st.button(f"🟢 Cancel", key=f"cancel_reject_leave_{request['id']}"):
+                            confirm.pop(request_id, None)
+                            st.rerun(scope="fragment")
+        
+        st.markdown("---")
+        st.markdown("")  # Space between requests
+
+
 # Main content - Pending Approvals
 st.subheader("📋 My Pending Leave Approvals")
 
 # Get pending approvals for this user
 pending_approvals = get_pending_approvals_for_approver(employee_id) if employee_id else []
+pending_approvals = [req for req in pending_approvals if req["id"] not in st.session_state.processed_leave_ids]
+
+# Prefetch requesters, then their supervisors, in batched reads; only ids not seen yet are fetched
+employee_docs = st.session_state.pending_employee_docs
+missing_ids = {req["employee_id"] for req in pending_approvals} - employee_docs.keys()
+if missing_ids:
+    employee_docs.update(get_users_by_ids(missing_ids, EMPLOYEE_DIALOG_FIELDS))
+    supervisor_ids = {employee_docs[eid].get("direct_supervisor_id") for eid in missing_ids if eid in employee_docs}
+    supervisor_ids = {sid for sid in supervisor_ids if sid} - employee_docs.keys()
+    if supervisor_ids:
+        employee_docs.update(get_users_by_ids(supervisor_ids, EMPLOYEE_DIALOG_FIELDS))
+
+# Balances are read fresh on every full run and reused only by detail-panel fragment reruns
+st.session_state.leave_quota_cache = {}
 
 if not pending_approvals:
     st.success("🎉 No pending leave requests for your approval!")
@@ -163,6 +476,9 @@ if not pending_approvals:
 else:
     st.markdown(f"### 📋 Pending Approvals ({len(pending_approvals)})")
     st.warning(f"⚠️ You have **{len(pending_approvals)}** leave request(s) awaiting your approval.")
+    
+    # Index once so selections resolve without rescanning the whole list
+    requests_by_id = {req["id"]: req for req in pending_approvals}
 
     # Bulk actions section
     if len(pending_approvals) > 1:
@@ -194,23 +510,41 @@ else:
         # Handle bulk approve selected
         if st.session_state.get("bulk_approve_selected"):
             st.warning("⚠️ **CONFIRM BULK APPROVAL**")
-            selected_requests = [req for req in pending_approvals if req["id"] in st.session_state.selected_leave_requests]
+            selected_requests = [requests_by_id[rid] for rid in st.session_state.selected_leave_requests if rid in requests_by_id]
             total_days = sum(req.get("working_days", 0) for req in selected_requests)
             
             st.write(f"Approve {len(selected_requests)} requests totaling {total_days} days?")
             
+            # Check annual leave balances for all selected employees in one batched read
+            annual_days = {}
+            employee_names = {}
+            for req in selected_requests:
+                if req.get("leave_type") == "annual":
+                    annual_days[req["employee_id"]] = annual_days.get(req["employee_id"], 0) + req.get("working_days", 0)
+                    employee_names[req["employee_id"]] = req.get("employee_name", "Unknown")
+            
+            if annual_days:
+                quotas = get_leave_quotas_by_ids(annual_days.keys())
+                for req_employee_id, days in annual_days.items():
+                    quota = quotas.get(req_employee_id)
+                    if not quota:
+                        continue
+                    remaining = (quota.get("annual_quota", 14) -
+                                 quota.get("annual_used", 0) -
+                                 quota.get("annual_pending", 0))
+                    if days > remaining:
+                        st.error(f"⚠️ **Warning:** {employee_names[req_employee_id]}'s annual leave ({days} days) exceeds available balance ({remaining} days)")
+            
             bulk_comments = st.text_area("Bulk approval comments:", key="bulk_approve_leave_comments")
             
             col_yes, col_no = st.columns(2)
             with col_yes:
                 if st.button("✅ Confirm Bulk Approve"):
-                    approved_count = 0
-                    for req_id in st.session_state.selected_leave_requests:
-                        result = approve_leave_request(req_id, employee_id, bulk_comments or "Bulk approved")
-                        if result["success"]:
-                            approved_count += 1
+                    result = bulk_process_leave_requests(
+                        st.session_state.selected_leave_requests, employee_id, "approve", bulk_comments or "Bulk approved"
+                    )
                     
-                    st.success(f"✅ Bulk approved {approved_count} requests")
+                    st.toast(f"✅ {result['message']}" if result["success"] else f"❌ {result['message']}")
                     st.session_state.bulk_approve_selected = False
                     st.session_state.selected_leave_requests.clear()
                     st.rerun()
@@ -223,7 +557,7 @@ else:
         # Handle bulk reject selected
         if st.session_state.get("bulk_reject_selected"):
             st.warning("⚠️ **CONFIRM BULK REJECTION**")
-            selected_requests = [req for req in pending_approvals if req["id"] in st.session_state.selected_leave_requests]
+            selected_requests = [requests_by_id[rid] for rid in st.session_state.selected_leave_requests if rid in requests_by_id]
             
             st.write(f"Reject {len(selected_requests)} selected requests?")
             
@@ -233,13 +567,11 @@ else:
                 col_yes, col_no = st.columns(2)
                 with col_yes:
                     if st.button("❌ Confirm Bulk Reject"):
-                        rejected_count = 0
-                        for req_id in st.session_state.selected_leave_requests:
-                            result = reject_leave_request(req_id, employee_id, bulk_comments)
-                            if result["success"]:
-                                rejected_count += 1
+                        result = bulk_process_leave_requests(
+                            st.session_state.selected_leave_requests, employee_id, "reject", bulk_comments
+                        )
                         
-                        st.success(f"✅ Bulk rejected {rejected_count} requests")
+                        st.toast(f"✅ {result['message']}" if result["success"] else f"❌ {result['message']}")
                         st.session_state.bulk_reject_selected = False
                         st.session_state.selected_leave_requests.clear()
                         st.rerun()
@@ -253,263 +585,79 @@ else:
         
         st.markdown("---")
 
-    # Individual requests with checkboxes
-    for i, request in enumerate(pending_approvals):
-        with st.container():
-            # Checkbox and header
-            col_check, col_header1, col_header2 = st.columns([0.5, 2.5, 1])
-            
-            with col_check:
-                is_selected = st.checkbox(
-                    "",
-                    value=request["id"] in st.session_state.selected_leave_requests,
-                    key=f"select_leave_{request['id']}",
-                    label_visibility="collapsed"
-                )
-                
-                if is_selected and request["id"] not in st.session_state.selected_leave_requests:
-                    st.session_state.selected_leave_requests.add(request["id"])
-                    st.rerun()
-                elif not is_selected and request["id"] in st.session_state.selected_leave_requests:
-                    st.session_state.selected_leave_requests.discard(request["id"])
-                    st.rerun()
-            
-            with col_header1:
-                leave_type_name = LEAVE_TYPES.get(request['leave_type'], {}).get('name', 'Unknown')
-                st.markdown(f"#### 📝 {request.get('employee_name', 'Unknown')}")
-                st.markdown(f"**{leave_type_name}** - {request['start_date']} to {request['end_date']}")
-            
-            with col_header2:
-                working_days = request.get('working_days', 0)
-                st.metric("Days", f"{working_days}")
-
-            # Basic info and actions
-            col1, col2, col3 = st.columns([2, 1, 1])
-            
-            with col1:
-                st.markdown(f"**👤 Employee:** {request.get('employee_name', 'Unknown')}")
-                st.markdown(f"**📅 Period:** {request['start_date']} to {request['end_date']}")
-                
-                # Show employee details button
-                if st.button(f"🔍 View Details", key=f"details_leave_{request['id']}"):
-                    st.session_state.dialog_employee_id = request.get('employee_id')
-                    st.session_state.show_employee_dialog = True
-                    st.rerun()
-            
-            with col2:
-                submitted_date = request.get('submitted_at')
-                if hasattr(submitted_date, 'timestamp'):
-                    submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %b %Y')
-                else:
-                    submitted_str = 'Unknown'
-                st.markdown(f"**📤 Submitted:** {submitted_str}")
-                st.markdown(f"**⏰ Status:** 🕐 Pending")
-            
-            with col3:
-                st.markdown("**🎯 Quick Actions:**")
-                
-                col_quick1, col_quick2 = st.columns(2)
-                
-                with col_quick1:
-                    if st.button("✅", key=f"quick_approve_leave_{request['id']}", help="Quick Approve"):
-                        result = approve_leave_request(request['id'], employee_id, "Quick approved")
-                        if result['success']:
-                            st.success("✅ Approved!")
-                            st.rerun()
-                        else:
-                            st.error(result['message'])
-                
-                with col_quick2:
-                    if st.button("❌", key=f"quick_reject_leave_{request['id']}", help="Quick Reject"):
-                        if f"quick_reject_reason_leave_{request['id']}" not in st.session_state:
-                            st.session_state[f"quick_reject_reason_leave_{request['id']}"] = True
-                            st.rerun()
-
-            # Quick reject reason
-            if st.session_state.get(f"quick_reject_reason_leave_{request['id']}"):
-                quick_reason = st.text_input(
-                    "Rejection reason:",
-                    key=f"reason_leave_{request['id']}",
-                    placeholder="Provide reason for rejection"
-                )
-                
-                col_confirm, col_cancel = st.columns(2)
-                with col_confirm:
-                    if st.button("Confirm Reject", key=f"confirm_reject_leave_{request['id']}"):
-                        if quick_reason.strip():
-                            result = reject_leave_request(request['id'], employee_id, quick_reason)
-                            if result['success']:
-                                st.success("❌ Rejected!")
-                                del st.session_state[f"quick_reject_reason_leave_{request['id']}"]
-                                st.rerun()
-                            else:
-                                st.error(result['message'])
-                        else:
-                            st.error("Please provide a reason")
-                
-                with col_cancel:
-                    if st.button("Cancel", key=f"cancel_reject_leave_{request['id']}"):
-                        del st.session_state[f"quick_reject_reason_leave_{request['id']}"]
-                        st.rerun()
-
-            # Leave request details in clean format
-            st.markdown("**📋 Leave Request Details:**")
-            
-            with st.container():
-                col_type, col_reason = st.columns([1, 2])
-                
-                with col_type:
-                    st.write(f"**Type:** {leave_type_name}")
-                    st.write(f"**Duration:** {working_days} working days")
-                
-                with col_reason:
-                    if request.get('reason'):
-                        st.write(f"**Reason:** {request['reason']}")
-                    
-                    if request.get('emergency_contact'):
-                        st.write(f"**Emergency Contact:** {request['emergency_contact']}")
-                    
-                    if request.get("attachment"):
-                        st.markdown("**📎 Attachments:**")
-                        attachment_data = request["attachment"]
-                        
-                        if isinstance(attachment_data, dict) and attachment_data.get("file_path"):
-                            display_file_attachment(
-                                attachment_data.get("file_path"), 
-                                attachment_data
-                            )
-                        else:
-                            st.caption(f"📎 {attachment_data}")
-
-            st.markdown("---")
-            
-            # Detailed approval actions
-            with st.expander(f"⚙️ Detailed Actions - {request.get('employee_name')}"):
-                # Employee leave balance (for annual leave)
-                if request['leave_type'] == 'annual':
-                    employee_quota = get_employee_leave_quota(request['employee_id'])
-                    if employee_quota:
-                        st.markdown("**📊 Employee Leave Balance:**")
-                        
-                        col_a, col_b, col_c, col_d = st.columns(4)
-                        
-                        with col_a:
-                            st.metric("Quota", f"{employee_quota.get('annual_quota', 14)} days")
-                        with col_b:
-                            st.metric("Used", f"{employee_quota.get('annual_used', 0)} days")
-                        with col_c:
-                            pending = employee_quota.get('annual_pending', 0)
-                            st.metric("Pending", f"{pending} days")
-                        with col_d:
-                            remaining = (employee_quota.get('annual_quota', 14) - 
-                                       employee_quota.get('annual_used', 0) - 
-                                       pending)
-                            st.metric("Available", f"{remaining} days")
-                        
-                        # Warning if request exceeds available balance
-                        if request.get('working_days', 0) > remaining:
-                            st.error(f"⚠️ **Warning:** This request ({request.get('working_days', 0)} days) exceeds available balance ({remaining} days)")
-                        
-                        st.markdown("---")
-                
-                # Create unique keys for each request
-                approve_key = f"approve_leave_{request['id']}"
-                reject_key = f"reject_leave_{request['id']}"
-                comments_key = f"comments_leave_{request['id']}"
-                
-                # Comments field
-                approval_comments = st.text_area(
-                    "💬 Comments (Optional)",
-                    key=comments_key,
-                    placeholder="Add any comments for the employee...",
-                    help="Comments will be visible to the employee",
-                    max_chars=500
-                )
-                
-                # Action buttons
-                col_approve, col_reject, col_info = st.columns([1, 1, 2])
-                
-                with col_approve:
-                    if st.button(f"✅ Approve", key=approve_key, type="primary", use_container_width=True):
-                        if f"confirm_approve_leave_{request['id']}" not in st.session_state:
-                            st.session_state[f"confirm_approve_leave_{request['id']}"] = True
-                            st.rerun()
-                
-                with col_reject:
-                    if st.button(f"❌ Reject", key=reject_key, type="secondary", use_container_width=True):
-                        if f"confirm_reject_leave_{request['id']}" not in st.session_state:
-                            st.session_state[f"confirm_reject_leave_{request['id']}"] = True
-                            st.rerun()
-                
-                with col_info:
-                    st.info("💡 Review carefully before deciding")
-
-                # Handle approval confirmation
-                if st.session_state.get(f"confirm_approve_leave_{request['id']}"):
-                    st.warning("⚠️ **CONFIRM APPROVAL**")
-                    st.write(f"Approve {request.get('working_days', 0)} days of {leave_type_name} for {request.get('employee_name')}?")
-                    
-                    col_yes, col_no = st.columns(2)
-                    
-                    with col_yes:
-                        if st.button(f"🟢 Yes, Approve", key=f"yes_approve_leave_{request['id']}", type="primary"):
-                            result = approve_leave_request(request['id'], employee_id, approval_comments)
-                            
-                            if result['success']:
-                                st.success(f"✅ {result['message']}")
-                                st.balloons()
-                                
-                                # Clear confirmation state
-                                if f"confirm_approve_leave_{request['id']}" in st.session_state:
-                                    del st.session_state[f"confirm_approve_leave_{request['id']}"]
-                                
-                                import time
-                                time.sleep(1)
-                                st.rerun()
-                            else:
-                                st.error(f"❌ {result['message']}")
-                    
-                    with col_no:
-                        if st.button(f"🔴 Cancel", key=f"cancel_approve_leave_{request['id']}"):
-                            if f"confirm_approve_leave_{request['id']}" in st.session_state:
-                                del st.session_state[f"confirm_approve_leave_{request['id']}"]
-                            st.rerun()
+    # Quick approvals are written in one batch when applied
+    queued_ids = st.session_state.queued_leave_approvals & requests_by_id.keys()
+    if queued_ids:
+        col_queue, col_apply, col_discard = st.columns([2, 1, 1])
+        
+        with col_queue:
+            st.info(f"⏳ {len(queued_ids)} quick approval(s) queued")
+        
+        with col_apply:
+            if st.button(f"⬆️ Apply {len(queued_ids)} queued", type="primary", use_container_width=True):
+                result = bulk_process_leave_requests(queued_ids, employee_id, "approve", "Quick approved")
+                st.toast(f"✅ {result['message']}" if result["success"] else f"❌ {result['message']}")
+                st.session_state.queued_leave_approvals.clear()
+                st.rerun()
+        
+        with col_discard:
+            if st.button("Discard queue", use_container_width=True):
+                st.session_state.queued_leave_approvals.clear()
+                st.rerun()
 
-                # Handle rejection confirmation
-                if st.session_state.get(f"confirm_reject_leave_{request['id']}"):
-                    st.warning("⚠️ **CONFIRM REJECTION**")
-                    st.write(f"Reject {leave_type_name} request from {request.get('employee_name')}?")
-                    
-                    # Require comments for rejection
-                    if not approval_comments.strip():
-                        st.error("📝 Please provide a reason for rejection in the comments field above.")
-                    else:
-                        col_yes, col_no = st.columns(2)
-                        
-                        with col_yes:
-                            if st.button(f"🔴 Yes, Reject", key=f"yes_reject_leave_{request['id']}", type="secondary"):
-                                result = reject_leave_request(request['id'], employee_id, approval_comments)
-                                
-                                if result['success']:
-                                    st.success(f"✅ {result['message']}")
-                                    
-                                    if f"confirm_reject_leave_{request['id']}" in st.session_state:
-                                        del st.session_state[f"confirm_reject_leave_{request['id']}"]
-                                    
-                                    import time
-                                    time.sleep(1)
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ {result['message']}")
-                        
-                        with col_no:
-                            if st.button(f"🟢 Cancel", key=f"cancel_reject_leave_{request['id']}"):
-                                if f"confirm_reject_leave_{request['id']}" in st.session_state:
-                                    del st.session_state[f"confirm_reject_leave_{request['id']}"]
-                                st.rerun()
-            
-            st.markdown("---")
-            st.markdown("")  # Space between requests
+    # One summary table; full details and actions only for the selected row.
+    # Selection/queue markers stay out of it so ticking them doesn't reset the selection.
+    row_ids = [request["id"] for request in pending_approvals]
+    pending_df = pd.DataFrame([
+        {
+            "Employee": request.get("employee_name", "Unknown"),
+            "Division": request.get("employee_division", "Unknown"),
+            "Type": LEAVE_TYPE_NAMES.get(request.get("leave_type"), "Unknown"),
+            "From": request.get("start_date"),
+            "To": request.get("end_date"),
+            "Days": request.get("working_days", 0),
+        }
+        for request in pending_approvals
+    ])
+    
+    # Row positions only mean something for the rows they were picked from
+    if st.session_state.pending_leave_row_ids != row_ids:
+        st.session_state.pending_leave_row_ids = row_ids
+        st.session_state.pop("pending_leave_table", None)
+    
+    event = st.dataframe(
+        pending_df,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="pending_leave_table"
+    )
+    
+    selected_rows = [row for row in event.selection.rows if row < len(row_ids)]
+    st.session_state.selected_leave_request_id = row_ids[selected_rows[0]] if selected_rows else None
+    
+    # Only requests still pending for this approver resolve
+    selected_request = requests_by_id.get(st.session_state.selected_leave_request_id)
+    if selected_request:
+        # The detail panel is a fragment so its widgets don't refetch the page
+        render_request(selected_request)
+    else:
+        st.caption("Select a request in the table to review it.")
+
+@st.cache_data(show_spinner=False)
+def leave_types_sidebar_html():
+    """Leave type reference for the sidebar, built once as a single HTML block"""
+    sections = []
+    for config in LEAVE_TYPES.values():
+        details = [html.escape(config['description'])]
+        if config.get('has_quota'):
+            details.append(f"Quota: {config.get('max_days', 'Variable')} days/year")
+        elif config.get('fixed_days'):
+            details.append(f"Fixed: {config['fixed_days']} days")
+        body = "".join(f"<p>{line}</p>" for line in details)
+        sections.append(f"<details><summary>{html.escape(config['name'])}</summary>{body}</details>")
+    return "".join(sections)
 
 # Sidebar with enhanced information
 st.sidebar.markdown("### 📋 Approval Guidelines")
@@ -532,29 +680,27 @@ st.sidebar.markdown("""
 # Show different sidebar content for admin
 if access_level == 1:
     st.sidebar.markdown("### 👑 Admin Privileges")
-    st.sidebar.success("✅ View all system requests")
-    st.sidebar.success("✅ Access complete leave history")
-    st.sidebar.success("✅ Organization overview")
-    st.sidebar.success("✅ System analytics")
-    st.sidebar.success("✅ Export capabilities")
+    st.sidebar.success("""
+✅ View all system requests  
+✅ Access complete leave history  
+✅ Organization overview  
+✅ System analytics  
+✅ Export capabilities
+""")
     
     st.sidebar.markdown("### 📊 System Quick Stats")
-    try:
-        # Quick stats for sidebar
-        total_pending = len(list(db.db.collection("leave_requests").where("status", "==", "pending").limit(50).stream()))
-        st.sidebar.metric("Total Pending", total_pending)
-        
-        total_users = len(list(db.db.collection("users_db").where("is_active", "==", True).limit(100).stream()))
-        st.sidebar.metric("Active Users", total_users)
-    except:
+    quick_stats = get_admin_quick_stats()
+    if quick_stats:
+        st.sidebar.metric("Total Pending", quick_stats["pending_leave"])
+        st.sidebar.metric("Active Users", quick_stats["active_users"])
+    else:
         st.sidebar.info("Loading stats...")
 
 else:
     # Regular user sidebar
     st.sidebar.markdown("### 👥 Your Approval Scope")
     
-    team_info = get_team_members(employee_id) if employee_id else {"direct_reports": [], "division_reports": [], "total_count": 0}
-    
+    # team_info was loaded for the approval scope banner above
     if team_info["direct_reports"]:
         st.sidebar.markdown("**Direct Reports:**")
         for member in team_info["direct_reports"][:5]:  # Show first 5
@@ -580,13 +726,7 @@ else:
     st.sidebar.success("All caught up! ✅")
 
 st.sidebar.markdown("### 📊 Leave Types")
-for leave_type, config in LEAVE_TYPES.items():
-    with st.sidebar.expander(config['name']):
-        st.write(config['description'])
-        if config.get('has_quota'):
-            st.write(f"Quota: {config.get('max_days', 'Variable')} days/year")
-        elif config.get('fixed_days'):
-            st.write(f"Fixed: {config['fixed_days']} days")
+st.sidebar.markdown(leave_types_sidebar_html(), unsafe_allow_html=True)
 
 st.sidebar.markdown("### 🆘 Need Help?")
 st.sidebar.info("""
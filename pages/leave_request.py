@@ -5,9 +5,10 @@ import utils.database as db
 from utils.auth import check_authentication
 from utils.logout_handler import is_authenticated, handle_logout, clear_cookies_js
 from utils.leave_system_db import (
-    LEAVE_TYPES, submit_leave_request, get_employee_leave_quota,
-    get_employee_leave_requests, calculate_working_days
+    LEAVE_TYPES, LEAVE_TYPE_NAMES, submit_leave_request, get_employee_leave_quota,
+    get_employee_leave_requests, calculate_working_days, get_leave_history_page_admin
 )
+from utils.dashboard_cache import clear_dashboard_cache
 
 # Import Firebase Storage utilities
 try:
@@ -40,6 +41,16 @@ user_data = st.session_state["user_data"]
 employee_id = user_data.get("employee_id")
 access_level = user_data.get("access_level", 4)
 
+FMT_LONG = "%d %B %Y, %H:%M"
+STATUS_LABELS = {"pending": "🕐 Pending", "approved_final": "✅ Approved", "rejected": "❌ Rejected"}
+MY_HISTORY_COLUMNS = ["leave_type", "start_date", "end_date", "working_days", "status", "submitted_at", "reason", "attachment"]
+
+def format_timestamp_column(timestamps, fmt, default="Unknown"):
+    """Vectorized db.format_timestamp for a column of Firestore timestamps"""
+    local_tz = datetime.now().astimezone().tzinfo
+    formatted = pd.to_datetime(timestamps, utc=True, errors="coerce").dt.tz_convert(local_tz).dt.strftime(fmt)
+    return formatted.fillna(default)
+
 def upload_file_to_firebase(uploaded_file, employee_id, request_type="leave"):
     """
     Upload file to Firebase Storage (called during form submission)
@@ -72,6 +83,41 @@ def upload_file_to_firebase(uploaded_file, employee_id, request_type="leave"):
     except Exception as e:
         return {"success": False, "message": f"Upload error: {str(e)}"}
 
+@st.cache_data(ttl=60, show_spinner=False)
+def load_my_leave_quota(employee_id):
+    """Current year's leave quota for the signed-in employee"""
+    return get_employee_leave_quota(employee_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_my_leave_requests(employee_id):
+    """Leave request history for the signed-in employee"""
+    return get_employee_leave_requests(employee_id)
+
+@st.cache_data(ttl=120, show_spinner="Loading leave history…")
+def load_leave_history_page(page_size, start_after_id, status=None, division=None, leave_type=None):
+    """One page of the organization-wide processed leave history"""
+    return get_leave_history_page_admin(page_size, start_after_id, status, division, leave_type)
+
+@st.cache_data(show_spinner=False)
+def leave_type_options_for(user_gender):
+    """Selectable leave types and their labels, filtered by gender where applicable"""
+    return {
+        key: f"{config['name']} - {config['description']}"
+        for key, config in LEAVE_TYPES.items()
+        if not config.get("gender_specific") or config["gender_specific"] == user_gender
+    }
+
+@st.cache_data(ttl=120, show_spinner=False)
+def leave_history_export_csv(request_ids, _df):
+    """CSV bytes for the admin leave history table, cached per set of displayed requests"""
+    return _df.to_csv(index=False).encode("utf-8")
+
+def clear_my_leave_cache():
+    """Drop the signed-in employee's cached quota and history after a submission"""
+    load_my_leave_quota.clear()
+    load_my_leave_requests.clear()
+
+@st.fragment
 def show_attachment_in_history(request):
     """Show file attachment in request history"""
     
@@ -86,10 +132,18 @@ def show_attachment_in_history(request):
         st.markdown("**📎 Attachment:**")
         
         if STORAGE_AVAILABLE:
-            display_file_attachment(
-                attachment_data.get("file_path"),
-                attachment_data
-            )
+            # Expander bodies always render, so only hit Storage once the user asks for the file
+            opened = st.session_state.setdefault("opened_attachments", set())
+            if request["id"] in opened:
+                display_file_attachment(
+                    attachment_data.get("file_path"),
+                    attachment_data
+                )
+            else:
+                st.caption(f"📎 {attachment_data.get('original_filename', 'Unknown file')}")
+                if st.button("🔗 Load attachment", key=f"load_attachment_{request['id']}"):
+                    opened.add(request["id"])
+                    st.rerun(scope="fragment")
         else:
             # Fallback display
             st.caption(f"📎 {attachment_data.get('original_filename', 'Unknown file')}")
@@ -131,14 +185,17 @@ with col2:
 
 st.divider()
 
-# Create tabs
-tab1, tab2, tab3 = st.tabs(["📝 New Request", "📊 My Leave Status", "📋 Request History"])
+# Create tabs (admin gets the organization-wide history)
+if access_level == 1:
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 New Request", "📊 My Leave Status", "📋 Request History", "🗂️ All Leave History"])
+else:
+    tab1, tab2, tab3 = st.tabs(["📝 New Request", "📊 My Leave Status", "📋 Request History"])
 
 with tab1:
     st.subheader("Submit New Leave Request")
     
     # Get leave quota info
-    leave_quota = get_employee_leave_quota(employee_id) if employee_id else None
+    leave_quota = load_my_leave_quota(employee_id) if employee_id else None
     
     if leave_quota:
         # Display current leave balance
@@ -165,14 +222,7 @@ with tab1:
         st.markdown("### Leave Request Details")
         
         # Leave type selection
-        leave_type_options = {}
-        for key, config in LEAVE_TYPES.items():
-            # Filter by gender if applicable
-            if config.get("gender_specific"):
-                user_gender = user_data.get("gender", "").lower()
-                if config["gender_specific"] != user_gender:
-                    continue
-            leave_type_options[key] = f"{config['name']} - {config['description']}"
+        leave_type_options = leave_type_options_for(user_data.get("gender", "").lower())
         
         selected_leave_type = st.selectbox(
             "Leave Type *",
@@ -332,6 +382,8 @@ with tab1:
                     result = submit_leave_request(employee_id, leave_data)
                     
                     if result["success"]:
+                        clear_dashboard_cache()
+                        clear_my_leave_cache()
                         st.success(f"✅ {result['message']}")
                         st.balloons()
                         
@@ -340,7 +392,7 @@ with tab1:
                         col1, col2 = st.columns(2)
                         
                         with col1:
-                            leave_type_name = LEAVE_TYPES.get(selected_leave_type, {}).get('name', 'Unknown')
+                            leave_type_name = LEAVE_TYPE_NAMES.get(selected_leave_type, 'Unknown')
                             st.write(f"**Leave Type:** {leave_type_name}")
                             st.write(f"**Duration:** {working_days} working days")
                             st.write(f"**Period:** {start_date} to {end_date}")
@@ -356,11 +408,6 @@ with tab1:
                         
                         st.info("📧 Your request has been sent to your supervisor for approval.")
                         
-                        # Auto-refresh after success
-                        import time
-                        time.sleep(3)
-                        st.rerun()
-                        
                     else:
                         st.error(f"❌ {result['message']}")
                         
@@ -431,93 +478,248 @@ with tab3:
     st.subheader("📋 My Leave Request History")
     
     # Get and display leave requests with attachment support
-    all_requests = get_employee_leave_requests(employee_id) if employee_id else []
+    all_requests = load_my_leave_requests(employee_id) if employee_id else []
     
     if not all_requests:
         st.info("📋 No leave requests found.")
     else:
         st.write(f"📊 **Total Requests:** {len(all_requests)}")
         
-        # Display requests
-        for i, request in enumerate(all_requests):
-            with st.container():
-                # Create columns for request details
-                col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
-                
-                with col1:
-                    leave_type_name = LEAVE_TYPES.get(request["leave_type"], {}).get("name", "Unknown")
-                    st.write(f"**{leave_type_name}**")
-                    st.caption(f"📅 {request['start_date']} to {request['end_date']}")
-                    if request.get("reason"):
-                        st.caption(f"💭 {request['reason'][:100]}{'...' if len(request['reason']) > 100 else ''}")
-                
-                with col2:
-                    st.write(f"**{request.get('working_days', 0)} days**")
-                
-                with col3:
-                    status = request.get("status", "unknown")
-                    if status == "pending":
-                        st.warning("🕐 Pending")
-                    elif status == "approved_final":
-                        st.success("✅ Approved")
-                    elif status == "rejected":
-                        st.error("❌ Rejected")
-                    else:
-                        st.info("📋 Processing")
-                
-                with col4:
-                    submitted_date = request.get("submitted_at")
-                    if hasattr(submitted_date, "timestamp"):
-                        submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime("%d/%m/%Y")
-                    else:
-                        submitted_str = "Unknown"
-                    st.caption(f"Submitted: {submitted_str}")
-                
-                # Show additional details in expander
-                with st.expander(f"Details - {leave_type_name} ({request['start_date']})"):
-                    col_a, col_b = st.columns(2)
+        view_mode = st.radio("View", ["📋 Table View", "🗂️ Detailed Cards"], horizontal=True, key="my_history_view")
+        
+        if view_mode == "📋 Table View":
+            # One virtualized grid instead of a card and expander per request
+            requests_df = pd.DataFrame(all_requests).reindex(columns=MY_HISTORY_COLUMNS)
+            history_table = pd.DataFrame({
+                "Leave Type": requests_df["leave_type"].map(LEAVE_TYPE_NAMES).fillna("Unknown"),
+                "Period": requests_df["start_date"].astype(str) + " to " + requests_df["end_date"].astype(str),
+                "Days": requests_df["working_days"].fillna(0),
+                "Status": requests_df["status"].map(STATUS_LABELS).fillna("📋 Processing"),
+                "Submitted": format_timestamp_column(requests_df["submitted_at"], "%d/%m/%Y"),
+                "Reason": requests_df["reason"].fillna(""),
+                "Attachment": requests_df["attachment"].notna().map({True: "📎", False: ""})
+            })
+            st.dataframe(
+                history_table,
+                use_container_width=True,
+                hide_index=True,
+                column_config={"Reason": st.column_config.TextColumn(width="large")}
+            )
+        
+        else:
+            CARDS_PER_PAGE = 10
+            if "card_page" not in st.session_state:
+                st.session_state.card_page = 0
+            
+            page_count = (len(all_requests) - 1) // CARDS_PER_PAGE + 1
+            card_page = min(st.session_state.card_page, page_count - 1)
+            page_requests = all_requests[card_page * CARDS_PER_PAGE:(card_page + 1) * CARDS_PER_PAGE]
+            
+            for request in page_requests:
+                with st.container():
+                    # Create columns for request details
+                    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
                     
-                    with col_a:
-                        st.write("**Request Information:**")
-                        st.write(f"• **Type:** {leave_type_name}")
-                        st.write(f"• **Duration:** {request.get('working_days', 0)} working days")
-                        st.write(f"• **Period:** {request['start_date']} to {request['end_date']}")
-                        st.write(f"• **Status:** {status.title()}")
-                        
-                        if request.get("emergency_contact"):
-                            st.write(f"• **Emergency Contact:** {request['emergency_contact']}")
+                    with col1:
+                        leave_type_name = LEAVE_TYPE_NAMES.get(request["leave_type"], "Unknown")
+                        st.write(f"**{leave_type_name}**")
+                        st.caption(f"📅 {request['start_date']} to {request['end_date']}")
+                        if request.get("reason"):
+                            st.caption(f"💭 {request['reason'][:100]}{'...' if len(request['reason']) > 100 else ''}")
+                    
+                    with col2:
+                        st.write(f"**{request.get('working_days', 0)} days**")
                     
-                    with col_b:
-                        st.write("**Processing Information:**")
+                    with col3:
+                        status = request.get("status", "unknown")
+                        if status == "pending":
+                            st.warning("🕐 Pending")
+                        elif status == "approved_final":
+                            st.success("✅ Approved")
+                        elif status == "rejected":
+                            st.error("❌ Rejected")
+                        else:
+                            st.info("📋 Processing")
+                    
+                    with col4:
+                        submitted_date = request.get("submitted_at")
+                        submitted_str = db.format_timestamp(submitted_date, "%d/%m/%Y")
+                        st.caption(f"Submitted: {submitted_str}")
+                    
+                    # Show additional details in expander
+                    with st.expander(f"Details - {leave_type_name} ({request['start_date']})"):
+                        col_a, col_b = st.columns(2)
                         
-                        if hasattr(submitted_date, "timestamp"):
-                            submitted_full = datetime.fromtimestamp(submitted_date.timestamp()).strftime("%d %B %Y, %H:%M")
-                            st.write(f"• **Submitted:** {submitted_full}")
+                        with col_a:
+                            st.write("**Request Information:**")
+                            st.write(f"• **Type:** {leave_type_name}")
+                            st.write(f"• **Duration:** {request.get('working_days', 0)} working days")
+                            st.write(f"• **Period:** {request['start_date']} to {request['end_date']}")
+                            st.write(f"• **Status:** {status.title()}")
+                            
+                            if request.get("emergency_contact"):
+                                st.write(f"• **Emergency Contact:** {request['emergency_contact']}")
                         
-                        if request.get("approved_at"):
-                            approved_date = request["approved_at"]
-                            if hasattr(approved_date, "timestamp"):
-                                approved_str = datetime.fromtimestamp(approved_date.timestamp()).strftime("%d %B %Y, %H:%M")
-                                st.write(f"• **Approved:** {approved_str}")
+                        with col_b:
+                            st.write("**Processing Information:**")
+                            
+                            submitted_full = db.format_timestamp(submitted_date, FMT_LONG, None)
+                            if submitted_full:
+                                st.write(f"• **Submitted:** {submitted_full}")
+                            
+                            if request.get("approved_at"):
+                                approved_date = request["approved_at"]
+                                approved_str = db.format_timestamp(approved_date, FMT_LONG, None)
+                                if approved_str:
+                                    st.write(f"• **Approved:** {approved_str}")
+                            
+                            if request.get("rejected_at"):
+                                rejected_date = request["rejected_at"]
+                                rejected_str = db.format_timestamp(rejected_date, FMT_LONG, None)
+                                if rejected_str:
+                                    st.write(f"• **Rejected:** {rejected_str}")
+                            
+                            if request.get("approver_comments"):
+                                st.write(f"• **Comments:** {request['approver_comments']}")
                         
-                        if request.get("rejected_at"):
-                            rejected_date = request["rejected_at"]
-                            if hasattr(rejected_date, "timestamp"):
-                                rejected_str = datetime.fromtimestamp(rejected_date.timestamp()).strftime("%d %B %Y, %H:%M")
-                                st.write(f"• **Rejected:** {rejected_str}")
+                        # Full reason
+                        if request.get("reason"):
+                            st.write("**Reason:**")
+                            st.write(request["reason"])
                         
-                        if request.get("approver_comments"):
-                            st.write(f"• **Comments:** {request['approver_comments']}")
-                    
-                    # Full reason
-                    if request.get("reason"):
-                        st.write("**Reason:**")
-                        st.write(request["reason"])
+                        # Show attachment with Firebase Storage support
+                        show_attachment_in_history(request)
                     
-                    # Show attachment with Firebase Storage support
-                    show_attachment_in_history(request)
+                    st.divider()
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            
+            with col1:
+                if st.button("⬅️ Previous", disabled=card_page == 0, key="card_prev", use_container_width=True):
+                    st.session_state.card_page = card_page - 1
+                    st.rerun()
+            
+            with col2:
+                st.caption(f"Page {card_page + 1} of {page_count}")
+            
+            with col3:
+                if st.button("Next ➡️", disabled=card_page >= page_count - 1, key="card_next", use_container_width=True):
+                    st.session_state.card_page = card_page + 1
+                    st.rerun()
+
+if access_level == 1:
+    with tab4:
+        st.subheader("🗂️ All Processed Leave Requests")
+        
+        # Tabs all render on every rerun, so only read Firestore once the admin asks for it
+        if "admin_history_loaded" not in st.session_state:
+            st.session_state.admin_history_loaded = False
+        
+        if st.session_state.admin_history_loaded or st.button("📥 Load all leave history"):
+            st.session_state.admin_history_loaded = True
+            
+            HISTORY_PAGE_SIZE = 50
+            HISTORY_COLUMNS = [
+                "id", "employee_name", "employee_division", "leave_type", "start_date", "end_date",
+                "working_days", "status", "final_processor_name", "approver_name", "submitted_at"
+            ]
+            
+            # Stack of cursor document IDs; the last entry is where the current page starts after
+            if "history_cursor" not in st.session_state:
+                st.session_state.history_cursor = [None]
+            
+            if "history_filters" not in st.session_state:
+                st.session_state.history_filters = None
+            
+            # Status, division and leave type are applied by Firestore; name search only covers the loaded page
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                status_filter = st.selectbox(
+                    "Status", [None, "approved_final", "rejected"],
+                    format_func=lambda x: {None: "All", "approved_final": "Approved", "rejected": "Rejected"}[x],
+                    key="history_status_filter"
+                )
+            with col2:
+                division_names = sorted(d.get("division_name", "") for d in db.get_all_divisions().values())
+                division_filter = st.selectbox("Division", [None] + division_names, format_func=lambda x: x or "All", key="history_division_filter")
+            with col3:
+                leave_type_filter = st.selectbox(
+                    "Leave Type", [None] + list(LEAVE_TYPE_NAMES.keys()),
+                    format_func=lambda x: LEAVE_TYPE_NAMES.get(x, "All"),
+                    key="history_leave_type_filter"
+                )
+            with col4:
+                employee_search = st.text_input("Employee", placeholder="Search this page...", key="history_employee_search")
+            
+            # Changing a server-side filter starts again from the first page
+            history_filters = (status_filter, division_filter, leave_type_filter)
+            if st.session_state.history_filters != history_filters:
+                st.session_state.history_filters = history_filters
+                st.session_state.history_cursor = [None]
+            
+            if st.button("🔄 Refresh", key="refresh_leave_history"):
+                load_leave_history_page.clear()
+                leave_history_export_csv.clear()
+                st.session_state.history_cursor = [None]
+            
+            page_number = len(st.session_state.history_cursor)
+            history_page = load_leave_history_page(HISTORY_PAGE_SIZE, st.session_state.history_cursor[-1], *history_filters)
+            
+            # One frame per page; filters and display columns are column operations
+            history_df = pd.DataFrame(history_page).reindex(columns=HISTORY_COLUMNS)
+            mask = pd.Series(True, index=history_df.index)
+            if employee_search:
+                mask &= history_df["employee_name"].fillna("").astype(str).str.contains(employee_search, case=False, regex=False)
+            view_df = history_df[mask]
+            
+            if view_df.empty:
+                st.info("📋 No processed leave requests found.")
+            else:
+                status_counts = view_df["status"].value_counts()
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Requests", len(view_df))
+                with col2:
+                    st.metric("Approved", int(status_counts.get("approved_final", 0)))
+                with col3:
+                    st.metric("Rejected", int(status_counts.get("rejected", 0)))
+            
+                history_table = pd.DataFrame({
+                    "Employee": view_df["employee_name"].fillna("Unknown"),
+                    "Division": view_df["employee_division"].fillna("Unknown"),
+                    "Leave Type": view_df["leave_type"].map(LEAVE_TYPE_NAMES).fillna("Unknown"),
+                    "Period": view_df["start_date"].astype(str) + " to " + view_df["end_date"].astype(str),
+                    "Days": view_df["working_days"].fillna(0),
+                    "Status": view_df["status"].map({"approved_final": "✅ Approved"}).fillna("❌ Rejected"),
+                    "Processed By": view_df["final_processor_name"].fillna(view_df["approver_name"]).fillna("Unknown"),
+                    "Submitted": format_timestamp_column(view_df["submitted_at"], "%d/%m/%Y")
+                })
+            
+                st.dataframe(history_table, use_container_width=True, hide_index=True)
                 
-                st.divider()
+                # Built once per set of rows, so the download click's rerun reuses the bytes
+                st.download_button(
+                    label="📥 Download CSV",
+                    data=leave_history_export_csv(tuple(view_df["id"]), history_table),
+                    file_name=f"leave_history_page{page_number}_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv",
+                    key="download_leave_history"
+                )
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            
+            with col1:
+                if st.button("⬅️ Prev page", disabled=page_number == 1, use_container_width=True):
+                    st.session_state.history_cursor.pop()
+                    st.rerun()
+            
+            with col2:
+                st.caption(f"Page {page_number} · {len(history_page)} requests")
+            
+            with col3:
+                if st.button("Next page ➡️", disabled=len(history_page) < HISTORY_PAGE_SIZE, use_container_width=True):
+                    st.session_state.history_cursor.append(history_page[-1]["id"])
+                    st.rerun()
 
 # Footer
 st.markdown("---")
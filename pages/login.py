@@ -81,15 +81,9 @@ def force_password_change_form(username):
             # Update password
             success, message = password_manager.update_password(username, new_password)
             if success:
-                st.success("✅ Password updated successfully!")
-                st.balloons()
+                st.toast("✅ Password updated successfully!")
                 # FIXED: Use a different session state variable name
                 st.session_state.needs_password_change = False
-                st.info("Redirecting to dashboard...")
-                
-                # Small delay for user to see the success message
-                import time
-                time.sleep(2)
                 st.rerun()
             else:
                 st.error(f"Failed to update password: {message}")
@@ -142,7 +136,7 @@ if check_logout_status():
     st.info("You can now log in again.")
 
 # Initialize authentication check
-authenticator = check_authentication()
+check_authentication()
 
 # Check if user is already authenticated (from cookies)
 if is_authenticated() and not check_logout_status():
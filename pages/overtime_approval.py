@@ -1,5 +1,6 @@
 # pages/overtime_approval.py - Enhanced with individual selection and dialog details
 import streamlit as st
+import heapq
 from datetime import datetime, date, timedelta
 import utils.database as db
 from utils.auth import check_authentication
@@ -8,7 +9,8 @@ from utils.leave_system_db import (
     get_pending_overtime_approvals_for_approver, approve_overtime_request, 
     reject_overtime_request, get_all_overtime_requests_admin,
     admin_override_overtime_request, get_employee_overtime_balance,
-    get_overtime_report_data, reset_overtime_balances, get_team_members
+    get_overtime_report_data, reset_overtime_balances, get_team_members,
+    get_system_pending_counts, get_user_doc
 )
 import pandas as pd
 
@@ -53,6 +55,32 @@ if "show_request_dialog" not in st.session_state:
 if "dialog_request" not in st.session_state:
     st.session_state.dialog_request = None
 
+if "pending_ot_page" not in st.session_state:
+    st.session_state.pending_ot_page = 1
+
+# Bumped whenever the selection is reset so the pending table drops stale checkbox edits
+if "pending_ot_table_version" not in st.session_state:
+    st.session_state.pending_ot_table_version = 0
+
+# Version and row ids the pending table's checkbox edits belong to
+if "pending_ot_table_state" not in st.session_state:
+    st.session_state.pending_ot_table_state = None
+
+def set_overtime_selection(request_ids):
+    """Replace the bulk selection and reset the pending table's checkbox edits"""
+    st.session_state.selected_requests = set(request_ids)
+    st.session_state.pending_ot_table_version += 1
+
+def sync_overtime_table_selection(table_key, row_ids):
+    """Apply checkbox edits from the pending table to the bulk selection"""
+    for row, changes in st.session_state[table_key]["edited_rows"].items():
+        if "Select" not in changes:
+            continue
+        if changes["Select"]:
+            st.session_state.selected_requests.add(row_ids[row])
+        else:
+            st.session_state.selected_requests.discard(row_ids[row])
+
 @st.dialog("Request Details")
 def show_request_details():
     if st.session_state.dialog_request:
@@ -75,8 +103,8 @@ def show_request_details():
             st.write(f"**⏰ Total Hours:** {request.get('total_hours', 0):.1f}h")
             
             submitted_date = request.get('submitted_at')
-            if hasattr(submitted_date, 'timestamp'):
-                submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %B %Y, %H:%M')
+            submitted_str = db.format_timestamp(submitted_date, '%d %B %Y, %H:%M', None)
+            if submitted_str:
                 st.write(f"**📤 Submitted:** {submitted_str}")
         
         st.markdown("---")
@@ -171,7 +199,7 @@ def show_employee_details():
     if st.session_state.dialog_employee_id:
         try:
             # Get employee data
-            employee_data = db.db.collection("users_db").document(st.session_state.dialog_employee_id).get().to_dict()
+            employee_data = get_user_doc(st.session_state.dialog_employee_id)
             
             if employee_data:
                 st.markdown(f"### 👤 {employee_data.get('name', 'Unknown')}")
@@ -204,15 +232,15 @@ def show_employee_details():
                 
                 # Additional info
                 join_date = employee_data.get('start_joining_date')
-                if join_date and hasattr(join_date, 'timestamp'):
-                    join_str = datetime.fromtimestamp(join_date.timestamp()).strftime('%d %B %Y')
+                join_str = db.format_timestamp(join_date, '%d %B %Y', None)
+                if join_str:
                     st.write(f"**📅 Joined:** {join_str}")
                 
                 # Supervisor info
                 supervisor_id = employee_data.get("direct_supervisor_id")
                 if supervisor_id:
                     try:
-                        supervisor_data = db.db.collection("users_db").document(supervisor_id).get().to_dict()
+                        supervisor_data = get_user_doc(supervisor_id)
                         if supervisor_data:
                             st.write(f"**👥 Supervisor:** {supervisor_data.get('name', 'Unknown')}")
                     except:
@@ -228,6 +256,17 @@ def show_employee_details():
         st.session_state.dialog_employee_id = None
         st.rerun()
 
+OVERTIME_STATUS_DISPLAY = {
+    "pending": "🕐 Pending",
+    "approved": "✅ Approved",
+    "rejected": "❌ Rejected"
+}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def overtime_export_csv(filters, _df):
+    """CSV bytes for the admin overtime table, cached per filter selection"""
+    return _df.to_csv(index=False).encode("utf-8")
+
 # Page header
 st.title("⏰ Overtime Request Approval")
 st.markdown(f"**Approver:** {user_data.get('name')} | **Role:** {user_data.get('role_name')}")
@@ -267,6 +306,229 @@ if st.session_state.show_request_dialog:
 if st.session_state.show_employee_dialog:
     show_employee_details()
 
+def get_recent_months():
+    """The last 12 months as YYYY-MM strings, newest first"""
+    # Generate last 12 months
+    return [(datetime.now() - timedelta(days=30*i)).strftime("%Y-%m") for i in range(12)]
+
+@st.fragment
+def render_payroll_reports():
+    """Payroll reports tab; its widgets rerun only this tab"""
+    st.subheader("📊 Overtime Payroll Reports")
+    st.info("👑 **Admin Tool:** Generate reports for payroll processing")
+    
+    # Month selection for payroll
+    available_months = get_recent_months()
+    
+    selected_month = st.selectbox(
+        "Select Month for Payroll Report",
+        options=available_months,
+        format_func=lambda x: datetime.strptime(x, "%Y-%m").strftime("%B %Y"),
+        index=0
+    )
+    
+    # Division filter for payroll
+    division_filter_payroll = st.selectbox(
+        "Filter by Division",
+        options=["All Divisions"] + list(set([r.get("employee_division", "Unknown") for r in get_all_overtime_requests_admin()])),
+        key="payroll_division_filter"
+    )
+    
+    # Generate payroll report
+    if st.button("📋 Generate Payroll Report", type="primary"):
+        division_id = None if division_filter_payroll == "All Divisions" else division_filter_payroll
+        
+        report_data = get_overtime_report_data(selected_month, division_id)
+        
+        if not report_data:
+            st.info(f"📊 No overtime data found for {datetime.strptime(selected_month, '%Y-%m').strftime('%B %Y')}")
+        else:
+            st.success(f"📊 Generated report for {len(report_data)} employees")
+            
+            # Summary statistics
+            total_employees = len(report_data)
+            total_approved_hours = sum(emp.get("approved_hours", 0) for emp in report_data)
+            total_balance_hours = sum(emp.get("balance_hours", 0) for emp in report_data)
+            total_calculated_pay = sum(emp.get("calculated_pay", 0) for emp in report_data)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Employees", total_employees)
+            with col2:
+                st.metric("Approved Hours", f"{total_approved_hours:.1f}h")
+            with col3:
+                st.metric("Payable Hours", f"{total_balance_hours:.1f}h")
+            with col4:
+                st.metric("Total Pay", f"${total_calculated_pay:,.2f}")
+            
+            # Detailed payroll table
+            st.markdown("### 💰 Detailed Payroll Report")
+            
+            payroll_df_data = []
+            for emp in report_data:
+                payroll_df_data.append({
+                    "Employee ID": emp.get("employee_id"),
+                    "Employee Name": emp.get("employee_name"),
+                    "Division": emp.get("division"),
+                    "Role": emp.get("role"),
+                    "Approved Hours": f"{emp.get('approved_hours', 0):.1f}h",
+                    "Paid Hours": f"{emp.get('paid_hours', 0):.1f}h",
+                    "Balance Hours": f"{emp.get('balance_hours', 0):.1f}h",
+                    "Overtime Rate": f"${emp.get('overtime_rate', 0):.2f}",
+                    "Calculated Pay": f"${emp.get('calculated_pay', 0):.2f}"
+                })
+            
+            payroll_df = pd.DataFrame(payroll_df_data)
+            st.dataframe(payroll_df, use_container_width=True, hide_index=True)
+            
+            # Export payroll report
+            col_export1, col_export2 = st.columns(2)
+            
+            with col_export1:
+                csv_payroll = payroll_df.to_csv(index=False)
+                st.download_button(
+                    label="📥 Download Payroll CSV",
+                    data=csv_payroll,
+                    file_name=f"overtime_payroll_{selected_month}.csv",
+                    mime="text/csv"
+                )
+            
+            with col_export2:
+                # Summary for HR
+                summary_text = f"""
+Overtime Payroll Summary - {datetime.strptime(selected_month, '%Y-%m').strftime('%B %Y')}
+
+Total Employees with Overtime: {total_employees}
+Total Approved Hours: {total_approved_hours:.1f}h
+Total Payable Hours: {total_balance_hours:.1f}h
+Total Calculated Pay: ${total_calculated_pay:,.2f}
+
+Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated by: {user_data.get('name')} (Admin)
+                """
+                
+                st.download_button(
+                    label="📋 Download Summary",
+                    data=summary_text,
+                    file_name=f"overtime_summary_{selected_month}.txt",
+                    mime="text/plain"
+                )
+
+@st.fragment
+def render_admin_controls():
+    """Admin overtime controls tab; its widgets rerun only this tab"""
+    st.subheader("⚙️ Admin Overtime Controls")
+    st.info("👑 **Admin Tools:** System management and maintenance")
+    
+    # Reset overtime balances after payroll
+    st.markdown("### 🔄 Payroll Processing")
+    
+    st.warning("""
+    **⚠️ Important:** Only reset overtime balances AFTER payroll has been processed!
+    
+    This action will:
+    - Mark all balance hours as "paid"
+    - Reset balance hours to 0 for all employees
+    - Keep approved hours for historical records
+    """)
+    
+    reset_month = st.selectbox(
+        "Select Month to Reset",
+        options=get_recent_months(),
+        format_func=lambda x: datetime.strptime(x, "%Y-%m").strftime("%B %Y"),
+        key="reset_month_selector"
+    )
+    
+    if st.button("🔄 Reset Overtime Balances", type="primary"):
+        if "confirm_reset_overtime" not in st.session_state:
+            st.session_state.confirm_reset_overtime = True
+            st.rerun(scope="fragment")
+    
+    if st.session_state.get("confirm_reset_overtime"):
+        st.error("⚠️ **DANGER ZONE - CONFIRM RESET**")
+        st.write(f"This will reset overtime balances for ALL employees in {datetime.strptime(reset_month, '%Y-%m').strftime('%B %Y')}")
+        st.write("**This action cannot be undone!**")
+        
+        reset_confirmation = st.text_input(
+            "Type 'RESET OVERTIME' to confirm:",
+            key="reset_confirmation_text"
+        )
+        
+        col_confirm, col_cancel = st.columns(2)
+        
+        with col_confirm:
+            if st.button("🔴 CONFIRM RESET", type="primary"):
+                if reset_confirmation == "RESET OVERTIME":
+                    result = reset_overtime_balances(reset_month)
+                    
+                    if result["success"]:
+                        st.toast(f"✅ {result['message']}")
+                        
+                        # Log the reset action
+                        st.info(f"Reset performed by: {user_data.get('name')} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    else:
+                        st.error(f"❌ {result['message']}")
+                    
+                    st.session_state.confirm_reset_overtime = False
+                    st.rerun()
+                else:
+                    st.error("Please type 'RESET OVERTIME' exactly to confirm")
+        
+        with col_cancel:
+            if st.button("❌ Cancel Reset"):
+                st.session_state.confirm_reset_overtime = False
+                st.rerun(scope="fragment")
+    
+    st.markdown("---")
+    
+    # System statistics
+    st.markdown("### 📊 System Statistics")
+    
+    all_requests = get_all_overtime_requests_admin()
+    current_year = datetime.now().year
+    
+    if all_requests:
+        requests_df = pd.DataFrame(all_requests, columns=["week_start", "status", "total_hours", "employee_division"])
+        requests_df = requests_df[requests_df["week_start"].astype(str).str.startswith(str(current_year))].copy()
+        requests_df["status"] = requests_df["status"].astype("category")
+        requests_df["total_hours"] = pd.to_numeric(requests_df["total_hours"], errors="coerce").fillna(0)
+        requests_df["employee_division"] = requests_df["employee_division"].fillna("Unknown")
+        
+        # One categorical count replaces a pass per status
+        status_counts = requests_df["status"].value_counts()
+        total_requests = len(requests_df)
+        total_hours = requests_df["total_hours"].sum().item()
+        approved_requests = int(status_counts.get("approved", 0))
+        pending_requests = int(status_counts.get("pending", 0))
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric(f"{current_year} Requests", total_requests)
+        with col2:
+            st.metric("Total Hours", f"{total_hours:.1f}h")
+        with col3:
+            st.metric("Approved", approved_requests)
+        with col4:
+            st.metric("Pending", pending_requests)
+        
+        # Division breakdown
+        if not requests_df.empty:
+            st.markdown("### 🏢 Division Breakdown")
+            
+            division_groups = requests_df.groupby("employee_division")
+            df_divisions = pd.DataFrame({
+                "Requests": division_groups.size(),
+                "Hours": division_groups["total_hours"].sum()
+            })
+            status_by_division = pd.crosstab(requests_df["employee_division"], requests_df["status"])
+            for status in ["approved", "pending", "rejected"]:
+                df_divisions[status.title()] = status_by_division.get(status, 0)
+            df_divisions = df_divisions.rename_axis("Division").reset_index()
+            st.dataframe(df_divisions, use_container_width=True, hide_index=True)
+
+
 # Create different tabs based on access level
 if access_level == 1:  # Admin gets additional tabs
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -290,6 +552,9 @@ with tab1:
     else:
         st.markdown(f"### 📋 Pending Approvals ({len(pending_approvals)})")
         st.warning(f"⚠️ You have **{len(pending_approvals)}** overtime request(s) awaiting your approval.")
+        
+        # Index once so selections resolve without rescanning the whole list
+        requests_by_id = {req["id"]: req for req in pending_approvals}
 
         # Bulk actions section - Available for both supervisors and admin
         if len(pending_approvals) > 1 and access_level in [1, 2, 3]:
@@ -299,12 +564,12 @@ with tab1:
             
             with col1:
                 if st.button("☑️ Select All"):
-                    st.session_state.selected_requests = {req["id"] for req in pending_approvals}
+                    set_overtime_selection(req["id"] for req in pending_approvals)
                     st.rerun()
             
             with col2:
                 if st.button("☐ Clear Selection"):
-                    st.session_state.selected_requests.clear()
+                    set_overtime_selection(())
                     st.rerun()
             
             with col3:
@@ -321,7 +586,7 @@ with tab1:
             # Handle bulk approve selected
             if st.session_state.get("bulk_approve_selected"):
                 st.warning("⚠️ **CONFIRM BULK APPROVAL**")
-                selected_requests = [req for req in pending_approvals if req["id"] in st.session_state.selected_requests]
+                selected_requests = [requests_by_id[rid] for rid in st.session_state.selected_requests if rid in requests_by_id]
                 total_hours = sum(req.get("total_hours", 0) for req in selected_requests)
                 
                 st.write(f"Approve {len(selected_requests)} requests totaling {total_hours:.1f} hours?")
@@ -339,7 +604,7 @@ with tab1:
                         
                         st.success(f"✅ Bulk approved {approved_count} requests")
                         st.session_state.bulk_approve_selected = False
-                        st.session_state.selected_requests.clear()
+                        set_overtime_selection(())
                         st.rerun()
                 
                 with col_no:
@@ -350,7 +615,7 @@ with tab1:
             # Handle bulk reject selected
             if st.session_state.get("bulk_reject_selected"):
                 st.warning("⚠️ **CONFIRM BULK REJECTION**")
-                selected_requests = [req for req in pending_approvals if req["id"] in st.session_state.selected_requests]
+                selected_requests = [requests_by_id[rid] for rid in st.session_state.selected_requests if rid in requests_by_id]
                 
                 st.write(f"Reject {len(selected_requests)} selected requests?")
                 
@@ -368,7 +633,7 @@ with tab1:
                             
                             st.success(f"✅ Bulk rejected {rejected_count} requests")
                             st.session_state.bulk_reject_selected = False
-                            st.session_state.selected_requests.clear()
+                            set_overtime_selection(())
                             st.rerun()
                     
                     with col_no:
@@ -380,13 +645,36 @@ with tab1:
             
             st.markdown("---")
 
+        # Only one page of requests gets its widgets built per run
+        PENDING_PAGE_SIZE = 20
+        page_count = (len(pending_approvals) - 1) // PENDING_PAGE_SIZE + 1
+        st.session_state.pending_ot_page = min(st.session_state.pending_ot_page, page_count)
+        page_start = (st.session_state.pending_ot_page - 1) * PENDING_PAGE_SIZE
+        page_requests = pending_approvals[page_start:page_start + PENDING_PAGE_SIZE]
+        
+        if page_count > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            
+            with col1:
+                if st.button("⬅️ Prev page", disabled=st.session_state.pending_ot_page == 1, use_container_width=True):
+                    st.session_state.pending_ot_page -= 1
+                    st.rerun()
+            
+            with col2:
+                st.caption(f"Page {st.session_state.pending_ot_page} of {page_count} · {len(pending_approvals)} requests")
+            
+            with col3:
+                if st.button("Next page ➡️", disabled=st.session_state.pending_ot_page == page_count, use_container_width=True):
+                    st.session_state.pending_ot_page += 1
+                    st.rerun()
+
         # Individual requests - Simplified table format for supervisors
         if access_level in [2, 3]:  # Supervisor view - simplified table
             st.markdown("### 📋 Requests Overview")
             
             # Create table data
             table_data = []
-            for request in pending_approvals:
+            for request in page_requests:
                 # Format overtime dates
                 entries = request.get('overtime_entries', [])
                 if entries:
@@ -400,69 +688,61 @@ with tab1:
                 
                 # Format submitted date
                 submitted_date = request.get('submitted_at')
-                if hasattr(submitted_date, 'timestamp'):
-                    submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %b %Y')
-                else:
-                    submitted_str = 'Unknown'
+                submitted_str = db.format_timestamp(submitted_date, '%d %b %Y')
                 
                 table_data.append({
-                    "employee_name": request.get('employee_name', 'Unknown'),
-                    "overtime_dates": date_range,
-                    "total_hours": request.get('total_hours', 0),
-                    "submitted_on": submitted_str,
-                    "status": "🕐 Pending",
-                    "request_id": request["id"],
-                    "employee_id": request.get('employee_id')
+                    "Select": request["id"] in st.session_state.selected_requests,
+                    "Employee": request.get('employee_name', 'Unknown'),
+                    "Overtime Dates": date_range,
+                    "Hours": request.get('total_hours', 0),
+                    "Submitted": submitted_str,
+                    "Status": "🕐 Pending"
                 })
             
-            # Display as interactive table
-            for i, row in enumerate(table_data):
-                with st.container():
-                    col1, col2, col3, col4, col5, col6, col7 = st.columns([0.3, 2, 1.5, 1, 1, 1, 1])
-                    
-                    with col1:
-                        is_selected = st.checkbox(
-                            "",
-                            value=row["request_id"] in st.session_state.selected_requests,
-                            key=f"select_table_{row['request_id']}",
-                            label_visibility="collapsed"
-                        )
-                        
-                        if is_selected and row["request_id"] not in st.session_state.selected_requests:
-                            st.session_state.selected_requests.add(row["request_id"])
-                            st.rerun()
-                        elif not is_selected and row["request_id"] in st.session_state.selected_requests:
-                            st.session_state.selected_requests.discard(row["request_id"])
-                            st.rerun()
-                    
-                    with col2:
-                        st.write(f"**{row['employee_name']}**")
-                    
-                    with col3:
-                        st.write(row['overtime_dates'])
-                    
-                    with col4:
-                        st.write(f"**{row['total_hours']:.1f}h**")
-                    
-                    with col5:
-                        st.write(row['submitted_on'])
-                    
-                    with col6:
-                        st.write(row['status'])
-                    
-                    with col7:
-                        if st.button("🔍 Detail", key=f"detail_table_{row['request_id']}"):
-                            # Store request details for dialog
-                            request_detail = next(req for req in pending_approvals if req["id"] == row["request_id"])
-                            st.session_state.dialog_request = request_detail
-                            st.session_state.show_request_dialog = True
-                            st.rerun()
-                    
-                    st.divider()
+            # One editable table instead of a row of widgets per request
+            # Checkbox edits are stored by row position, so drop them whenever the rows or selection reset
+            row_ids = [request["id"] for request in page_requests]
+            table_key = "pending_ot_table"
+            table_state = (st.session_state.pending_ot_table_version, row_ids)
+            if st.session_state.pending_ot_table_state != table_state:
+                st.session_state.pending_ot_table_state = table_state
+                st.session_state.pop(table_key, None)
+            st.data_editor(
+                pd.DataFrame(table_data),
+                column_config={
+                    "Select": st.column_config.CheckboxColumn("Select"),
+                    "Hours": st.column_config.NumberColumn("Hours", format="%.1fh")
+                },
+                disabled=["Employee", "Overtime Dates", "Hours", "Submitted", "Status"],
+                hide_index=True,
+                use_container_width=True,
+                key=table_key,
+                on_change=sync_overtime_table_selection,
+                args=(table_key, row_ids)
+            )
+            
+            col_pick, col_open = st.columns([3, 1])
+            
+            with col_pick:
+                detail_id = st.selectbox(
+                    "Request details",
+                    options=row_ids,
+                    index=None,
+                    format_func=lambda rid: f"{requests_by_id[rid].get('employee_name', 'Unknown')} · {requests_by_id[rid].get('week_start')} to {requests_by_id[rid].get('week_end')}",
+                    placeholder="Choose a request to review",
+                    label_visibility="collapsed"
+                )
+            
+            with col_open:
+                if st.button("🔍 Detail", disabled=detail_id is None, use_container_width=True):
+                    # Store request details for dialog
+                    st.session_state.dialog_request = requests_by_id[detail_id]
+                    st.session_state.show_request_dialog = True
+                    st.rerun()
         
         else:  # Admin view - detailed cards
             # Individual requests with checkboxes for admin
-            for i, request in enumerate(pending_approvals):
+            for i, request in enumerate(page_requests):
                 with st.container():
                     # Checkbox and header
                     col_check, col_header1, col_header2 = st.columns([0.5, 2.5, 1])
@@ -507,10 +787,7 @@ with tab1:
                 
                 with col2:
                     submitted_date = request.get('submitted_at')
-                    if hasattr(submitted_date, 'timestamp'):
-                        submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %b %Y')
-                    else:
-                        submitted_str = 'Unknown'
+                    submitted_str = db.format_timestamp(submitted_date, '%d %b %Y')
                     st.markdown(f"**📤 Submitted:** {submitted_str}")
                     st.markdown(f"**⏰ Status:** 🕐 Pending")
                 
@@ -635,15 +912,12 @@ with tab1:
                                 result = approve_overtime_request(request['id'], employee_id, approval_comments)
                                 
                                 if result['success']:
-                                    st.success(f"✅ {result['message']}")
-                                    st.balloons()
+                                    st.toast(f"✅ {result['message']}")
                                     
                                     # Clear confirmation state
                                     if f"confirm_approve_ot_{request['id']}" in st.session_state:
                                         del st.session_state[f"confirm_approve_ot_{request['id']}"]
                                     
-                                    import time
-                                    time.sleep(1)
                                     st.rerun()
                                 else:
                                     st.error(f"❌ {result['message']}")
@@ -670,13 +944,11 @@ with tab1:
                                     result = reject_overtime_request(request['id'], employee_id, approval_comments)
                                     
                                     if result['success']:
-                                        st.success(f"✅ {result['message']}")
+                                        st.toast(f"✅ {result['message']}")
                                         
                                         if f"confirm_reject_ot_{request['id']}" in st.session_state:
                                             del st.session_state[f"confirm_reject_ot_{request['id']}"]
                                         
-                                        import time
-                                        time.sleep(1)
                                         st.rerun()
                                     else:
                                         st.error(f"❌ {result['message']}")
@@ -696,28 +968,36 @@ if access_level == 1:
         st.subheader("🌐 All Overtime Requests (Admin View)")
         st.info("👑 **Admin Privilege:** View and manage all overtime requests across the organization")
         
-        # Get all overtime requests
-        all_overtime_requests = get_all_overtime_requests_admin()
+        col1, col2, col3, col4 = st.columns(4)
+        
+        # Status is applied in the query itself, so pick it before fetching
+        with col1:
+            status_filter = st.selectbox(
+                "Status",
+                options=["All", "Pending", "Approved", "Rejected"],
+                key="admin_ot_status_filter"
+            )
+        
+        all_overtime_requests = get_all_overtime_requests_admin(
+            status_filter.lower() if status_filter != "All" else None
+        )
         
         if not all_overtime_requests:
-            st.info("📋 No overtime requests found in the system.")
+            st.info("📋 No overtime requests found for this status.")
         else:
-            st.success(f"📊 **{len(all_overtime_requests)}** total overtime requests found")
+            st.success(f"📊 **{len(all_overtime_requests)}** overtime requests found")
             
             # Filter options
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                status_filter = st.selectbox(
-                    "Status",
-                    options=["All", "Pending", "Approved", "Rejected"],
-                    key="admin_ot_status_filter"
-                )
+            divisions, approvers = set(), set()
+            for r in all_overtime_requests:
+                divisions.add(r.get("employee_division", "Unknown"))
+                if r.get("approver_name"):
+                    approvers.add(r["approver_name"])
             
             with col2:
                 division_filter = st.selectbox(
                     "Division",
-                    options=["All"] + list(set([r.get("employee_division", "Unknown") for r in all_overtime_requests])),
+                    options=["All", *sorted(divisions)],
                     key="admin_ot_division_filter"
                 )
             
@@ -731,24 +1011,28 @@ if access_level == 1:
             with col4:
                 approver_filter = st.selectbox(
                     "Approver",
-                    options=["All"] + list(set([r.get("approver_name", "Unknown") for r in all_overtime_requests if r.get("approver_name")])),
+                    options=["All", *sorted(approvers)],
                     key="admin_ot_approver_filter"
                 )
             
-            # Apply filters
-            filtered_requests = all_overtime_requests
-            
-            if status_filter != "All":
-                filtered_requests = [r for r in filtered_requests if r.get("status") == status_filter.lower()]
+            # Apply filters as boolean masks over a single DataFrame
+            filter_df = pd.DataFrame({
+                "division": [r.get("employee_division") for r in all_overtime_requests],
+                "week_start": [r.get("week_start") or "" for r in all_overtime_requests],
+                "approver": [r.get("approver_name") for r in all_overtime_requests],
+            })
+            mask = pd.Series(True, index=filter_df.index)
             
             if division_filter != "All":
-                filtered_requests = [r for r in filtered_requests if r.get("employee_division") == division_filter]
+                mask &= filter_df["division"].eq(division_filter)
             
             if month_filter != "All":
-                filtered_requests = [r for r in filtered_requests if r.get("week_start", "").startswith(month_filter)]
+                mask &= filter_df["week_start"].str.startswith(month_filter)
             
             if approver_filter != "All":
-                filtered_requests = [r for r in filtered_requests if r.get("approver_name") == approver_filter]
+                mask &= filter_df["approver"].eq(approver_filter)
+            
+            filtered_requests = [all_overtime_requests[i] for i in filter_df.index[mask]]
             
             # Display filtered results
             if filtered_requests:
@@ -852,9 +1136,16 @@ if access_level == 1:
                             st.error("Please provide a reason for bulk rejection")
                 
                 # Summary statistics
-                total_hours = sum([r.get("total_hours", 0) for r in filtered_requests])
-                approved_hours = sum([r.get("total_hours", 0) for r in filtered_requests if r.get("status") == "approved"])
-                pending_count = len([r for r in filtered_requests if r.get("status") == "pending"])
+                total_hours = approved_hours = 0
+                pending_count = 0
+                for r in filtered_requests:
+                    hours = r.get("total_hours", 0)
+                    status = r.get("status")
+                    total_hours += hours
+                    if status == "approved":
+                        approved_hours += hours
+                    elif status == "pending":
+                        pending_count += 1
                 
                 col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
                 
@@ -911,8 +1202,8 @@ if access_level == 1:
                                     st.error("❌ Rejected")
                                 
                                 submitted_date = req.get('submitted_at')
-                                if hasattr(submitted_date, 'timestamp'):
-                                    submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %b %Y')
+                                submitted_str = db.format_timestamp(submitted_date, '%d %b %Y', None)
+                                if submitted_str:
                                     st.caption(f"Submitted: {submitted_str}")
                         
                         with col_actions:
@@ -1044,277 +1335,45 @@ if access_level == 1:
                         else:
                             st.error("Please provide a reason for bulk rejection")
                 
-                # Convert to DataFrame for table display
-                table_data = []
-                for req in filtered_requests:
-                    submitted_date = req.get('submitted_at')
-                    if hasattr(submitted_date, 'timestamp'):
-                        submitted_str = datetime.fromtimestamp(submitted_date.timestamp()).strftime('%d %b %Y')
-                    else:
-                        submitted_str = 'Unknown'
-                    
-                    # Status with icon
-                    status = req.get("status", "unknown")
-                    if status == "pending":
-                        status_display = "🕐 Pending"
-                    elif status == "approved":
-                        status_display = "✅ Approved"
-                    elif status == "rejected":
-                        status_display = "❌ Rejected"
-                    else:
-                        status_display = "📋 Processing"
-                    
-                    processor_name = req.get("final_processor_name", "")
-                    is_admin_override = req.get("is_admin_override", False)
-                    processor_display = f"{processor_name} {'(Admin)' if is_admin_override else ''}" if processor_name else ""
-                    
-                    table_data.append({
-                        "Employee": req.get("employee_name", "Unknown"),
-                        "Division": req.get("employee_division", "Unknown"),
-                        "Week": f"{req.get('week_start')} to {req.get('week_end')}",
-                        "Hours": f"{req.get('total_hours', 0):.1f}h",
-                        "Status": status_display,
-                        "Approver": req.get("approver_name", "Unknown"),
-                        "Processed By": processor_display,
-                        "Submitted": submitted_str
-                    })
+                # Build the table with column operations on one DataFrame
+                source_df = pd.DataFrame(filtered_requests).reindex(columns=[
+                    "employee_name", "employee_division", "week_start", "week_end", "total_hours",
+                    "status", "approver_name", "final_processor_name", "is_admin_override", "submitted_at"
+                ])
+                processor_names = source_df["final_processor_name"].fillna("")
+                admin_suffix = source_df["is_admin_override"].map(lambda override: " (Admin)" if override is True else "")
                 
-                df_overtime = pd.DataFrame(table_data)
+                df_overtime = pd.DataFrame({
+                    "Employee": source_df["employee_name"].fillna("Unknown"),
+                    "Division": source_df["employee_division"].fillna("Unknown"),
+                    "Week": source_df["week_start"].fillna("").astype(str) + " to " + source_df["week_end"].fillna("").astype(str),
+                    "Hours": source_df["total_hours"].fillna(0).map("{:.1f}h".format),
+                    "Status": source_df["status"].map(OVERTIME_STATUS_DISPLAY).fillna("📋 Processing"),
+                    "Approver": source_df["approver_name"].fillna("Unknown"),
+                    "Processed By": (processor_names + admin_suffix).where(processor_names != "", ""),
+                    "Submitted": source_df["submitted_at"].map(lambda ts: db.format_timestamp(ts, '%d %b %Y'))
+                })
                 st.dataframe(df_overtime, use_container_width=True, hide_index=True)
                 
                 # Export option
-                if st.button("📊 Export Overtime Data"):
-                    csv = df_overtime.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Download CSV",
-                        data=csv,
-                        file_name=f"overtime_requests_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
+                export_filters = (
+                    status_filter, division_filter, month_filter, approver_filter,
+                    tuple((r["id"], r.get("status")) for r in filtered_requests)
+                )
+                st.download_button(
+                    label="📥 Download CSV",
+                    data=overtime_export_csv(export_filters, df_overtime),
+                    file_name=f"overtime_requests_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv"
+                )
             else:
                 st.info("No requests match the selected filters.")
 
     with tab3:
-        st.subheader("📊 Overtime Payroll Reports")
-        st.info("👑 **Admin Tool:** Generate reports for payroll processing")
-        
-        # Month selection for payroll
-        current_month = datetime.now().strftime("%Y-%m")
-        available_months = []
-        
-        # Generate last 12 months
-        for i in range(12):
-            month_date = datetime.now() - timedelta(days=30*i)
-            available_months.append(month_date.strftime("%Y-%m"))
-        
-        selected_month = st.selectbox(
-            "Select Month for Payroll Report",
-            options=available_months,
-            format_func=lambda x: datetime.strptime(x, "%Y-%m").strftime("%B %Y"),
-            index=0
-        )
-        
-        # Division filter for payroll
-        division_filter_payroll = st.selectbox(
-            "Filter by Division",
-            options=["All Divisions"] + list(set([r.get("employee_division", "Unknown") for r in get_all_overtime_requests_admin()])),
-            key="payroll_division_filter"
-        )
-        
-        # Generate payroll report
-        if st.button("📋 Generate Payroll Report", type="primary"):
-            division_id = None if division_filter_payroll == "All Divisions" else division_filter_payroll
-            
-            report_data = get_overtime_report_data(selected_month, division_id)
-            
-            if not report_data:
-                st.info(f"📊 No overtime data found for {datetime.strptime(selected_month, '%Y-%m').strftime('%B %Y')}")
-            else:
-                st.success(f"📊 Generated report for {len(report_data)} employees")
-                
-                # Summary statistics
-                total_employees = len(report_data)
-                total_approved_hours = sum([emp.get("approved_hours", 0) for emp in report_data])
-                total_balance_hours = sum([emp.get("balance_hours", 0) for emp in report_data])
-                total_calculated_pay = sum([emp.get("calculated_pay", 0) for emp in report_data])
-                
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("Employees", total_employees)
-                with col2:
-                    st.metric("Approved Hours", f"{total_approved_hours:.1f}h")
-                with col3:
-                    st.metric("Payable Hours", f"{total_balance_hours:.1f}h")
-                with col4:
-                    st.metric("Total Pay", f"${total_calculated_pay:,.2f}")
-                
-                # Detailed payroll table
-                st.markdown("### 💰 Detailed Payroll Report")
-                
-                payroll_df_data = []
-                for emp in report_data:
-                    payroll_df_data.append({
-                        "Employee ID": emp.get("employee_id"),
-                        "Employee Name": emp.get("employee_name"),
-                        "Division": emp.get("division"),
-                        "Role": emp.get("role"),
-                        "Approved Hours": f"{emp.get('approved_hours', 0):.1f}h",
-                        "Paid Hours": f"{emp.get('paid_hours', 0):.1f}h",
-                        "Balance Hours": f"{emp.get('balance_hours', 0):.1f}h",
-                        "Overtime Rate": f"${emp.get('overtime_rate', 0):.2f}",
-                        "Calculated Pay": f"${emp.get('calculated_pay', 0):.2f}"
-                    })
-                
-                payroll_df = pd.DataFrame(payroll_df_data)
-                st.dataframe(payroll_df, use_container_width=True, hide_index=True)
-                
-                # Export payroll report
-                col_export1, col_export2 = st.columns(2)
-                
-                with col_export1:
-                    csv_payroll = payroll_df.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Download Payroll CSV",
-                        data=csv_payroll,
-                        file_name=f"overtime_payroll_{selected_month}.csv",
-                        mime="text/csv"
-                    )
-                
-                with col_export2:
-                    # Summary for HR
-                    summary_text = f"""
-Overtime Payroll Summary - {datetime.strptime(selected_month, '%Y-%m').strftime('%B %Y')}
-
-Total Employees with Overtime: {total_employees}
-Total Approved Hours: {total_approved_hours:.1f}h
-Total Payable Hours: {total_balance_hours:.1f}h
-Total Calculated Pay: ${total_calculated_pay:,.2f}
-
-Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Generated by: {user_data.get('name')} (Admin)
-                    """
-                    
-                    st.download_button(
-                        label="📋 Download Summary",
-                        data=summary_text,
-                        file_name=f"overtime_summary_{selected_month}.txt",
-                        mime="text/plain"
-                    )
+        render_payroll_reports()
 
     with tab4:
-        st.subheader("⚙️ Admin Overtime Controls")
-        st.info("👑 **Admin Tools:** System management and maintenance")
-        
-        # Reset overtime balances after payroll
-        st.markdown("### 🔄 Payroll Processing")
-        
-        st.warning("""
-        **⚠️ Important:** Only reset overtime balances AFTER payroll has been processed!
-        
-        This action will:
-        - Mark all balance hours as "paid"
-        - Reset balance hours to 0 for all employees
-        - Keep approved hours for historical records
-        """)
-        
-        reset_month = st.selectbox(
-            "Select Month to Reset",
-            options=available_months,
-            format_func=lambda x: datetime.strptime(x, "%Y-%m").strftime("%B %Y"),
-            key="reset_month_selector"
-        )
-        
-        if st.button("🔄 Reset Overtime Balances", type="primary"):
-            if "confirm_reset_overtime" not in st.session_state:
-                st.session_state.confirm_reset_overtime = True
-                st.rerun()
-        
-        if st.session_state.get("confirm_reset_overtime"):
-            st.error("⚠️ **DANGER ZONE - CONFIRM RESET**")
-            st.write(f"This will reset overtime balances for ALL employees in {datetime.strptime(reset_month, '%Y-%m').strftime('%B %Y')}")
-            st.write("**This action cannot be undone!**")
-            
-            reset_confirmation = st.text_input(
-                "Type 'RESET OVERTIME' to confirm:",
-                key="reset_confirmation_text"
-            )
-            
-            col_confirm, col_cancel = st.columns(2)
-            
-            with col_confirm:
-                if st.button("🔴 CONFIRM RESET", type="primary"):
-                    if reset_confirmation == "RESET OVERTIME":
-                        result = reset_overtime_balances(reset_month)
-                        
-                        if result["success"]:
-                            st.success(f"✅ {result['message']}")
-                            st.balloons()
-                            
-                            # Log the reset action
-                            st.info(f"Reset performed by: {user_data.get('name')} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                        else:
-                            st.error(f"❌ {result['message']}")
-                        
-                        st.session_state.confirm_reset_overtime = False
-                        st.rerun()
-                    else:
-                        st.error("Please type 'RESET OVERTIME' exactly to confirm")
-            
-            with col_cancel:
-                if st.button("❌ Cancel Reset"):
-                    st.session_state.confirm_reset_overtime = False
-                    st.rerun()
-        
-        st.markdown("---")
-        
-        # System statistics
-        st.markdown("### 📊 System Statistics")
-        
-        all_requests = get_all_overtime_requests_admin()
-        current_year = datetime.now().year
-        
-        if all_requests:
-            year_requests = [r for r in all_requests if r.get("week_start", "").startswith(str(current_year))]
-            
-            total_requests = len(year_requests)
-            total_hours = sum([r.get("total_hours", 0) for r in year_requests])
-            approved_requests = len([r for r in year_requests if r.get("status") == "approved"])
-            pending_requests = len([r for r in year_requests if r.get("status") == "pending"])
-            
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric(f"{current_year} Requests", total_requests)
-            with col2:
-                st.metric("Total Hours", f"{total_hours:.1f}h")
-            with col3:
-                st.metric("Approved", approved_requests)
-            with col4:
-                st.metric("Pending", pending_requests)
-            
-            # Division breakdown
-            division_stats = {}
-            for req in year_requests:
-                division = req.get("employee_division", "Unknown")
-                if division not in division_stats:
-                    division_stats[division] = {"requests": 0, "hours": 0}
-                division_stats[division]["requests"] += 1
-                division_stats[division]["hours"] += req.get("total_hours", 0)
-            
-            if division_stats:
-                st.markdown("### 🏢 Division Breakdown")
-                
-                division_chart_data = []
-                for division, stats in division_stats.items():
-                    division_chart_data.append({
-                        "Division": division,
-                        "Requests": stats["requests"],
-                        "Hours": stats["hours"]
-                    })
-                
-                df_divisions = pd.DataFrame(division_chart_data)
-                st.dataframe(df_divisions, use_container_width=True, hide_index=True)
+        render_admin_controls()
 
 # Non-admin tab
 if access_level != 1:
@@ -1331,7 +1390,7 @@ if access_level != 1:
                 request_data["id"] = doc.id
                 
                 # Enrich with employee data
-                employee_data = db.db.collection("users_db").document(request_data["employee_id"]).get().to_dict()
+                employee_data = get_user_doc(request_data["employee_id"])
                 if employee_data:
                     # Get division and role names
                     division_data = db.db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
@@ -1348,9 +1407,9 @@ if access_level != 1:
             else:
                 # Summary statistics
                 total_processed = len(all_processed)
-                total_approved = len([r for r in all_processed if r.get("status") == "approved"])
-                total_rejected = len([r for r in all_processed if r.get("status") == "rejected"])
-                total_hours_approved = sum([r.get("total_hours", 0) for r in all_processed if r.get("status") == "approved"])
+                total_approved = sum(1 for r in all_processed if r.get("status") == "approved")
+                total_rejected = sum(1 for r in all_processed if r.get("status") == "rejected")
+                total_hours_approved = sum(r.get("total_hours", 0) for r in all_processed if r.get("status") == "approved")
                 
                 col1, col2, col3, col4 = st.columns(4)
                 
@@ -1366,10 +1425,10 @@ if access_level != 1:
                 # Display history
                 st.markdown("### 📋 Recent Approvals")
                 
-                # Sort by processing date
-                all_processed.sort(key=lambda x: x.get("approved_at") or x.get("rejected_at") or 0, reverse=True)
+                # Keep only the 10 most recently processed without sorting the whole history
+                recent_processed = heapq.nlargest(10, all_processed, key=lambda x: x.get("approved_at") or x.get("rejected_at") or 0)
                 
-                for request in all_processed[:10]:  # Show last 10
+                for request in recent_processed:
                     with st.container():
                         col1, col2, col3 = st.columns([2, 1, 1])
                         
@@ -1389,8 +1448,8 @@ if access_level != 1:
                         
                         # Processing date
                         process_date = request.get("approved_at") or request.get("rejected_at")
-                        if hasattr(process_date, "timestamp"):
-                            process_str = datetime.fromtimestamp(process_date.timestamp()).strftime("%d %b %Y")
+                        process_str = db.format_timestamp(process_date, "%d %b %Y", None)
+                        if process_str:
                             st.caption(f"Processed: {process_str}")
                         
                         if request.get("approver_comments"):
@@ -1402,9 +1461,9 @@ if access_level != 1:
             st.error(f"Error loading approval history: {e}")
 
 # Sidebar with information
-st.sidebar.markdown("### ⏰ Overtime Guidelines")
-
 st.sidebar.markdown("""
+### ⏰ Overtime Guidelines
+
 **Approval Criteria:**
 - ✅ Valid business justification
 - ✅ Reasonable hours (max 12h/day)
@@ -1424,12 +1483,14 @@ st.sidebar.markdown("""
 """)
 
 if access_level == 1:
-    st.sidebar.markdown("### 👑 Admin Privileges")
-    st.sidebar.success("✅ Override any request")
-    st.sidebar.success("✅ Bulk approve/reject")
-    st.sidebar.success("✅ Generate payroll reports")
-    st.sidebar.success("✅ Reset balances")
-    st.sidebar.success("✅ System statistics")
+    st.sidebar.success("""
+### 👑 Admin Privileges
+- ✅ Override any request
+- ✅ Bulk approve/reject
+- ✅ Generate payroll reports
+- ✅ Reset balances
+- ✅ System statistics
+""")
 
 st.sidebar.markdown("### 📊 Quick Stats")
 
@@ -1444,13 +1505,15 @@ if pending_approvals:
 else:
     st.sidebar.success("All caught up! ✅")
 
-# Show system stats for admin
+# Show system stats for admin (loaded on demand, kept for the session)
 if access_level == 1:
-    try:
-        all_pending = [r for r in get_all_overtime_requests_admin() if r.get("status") == "pending"]
-        st.sidebar.metric("System Pending", len(all_pending))
-    except:
-        pass
+    if st.sidebar.button("🔄 Refresh system stats", key="refresh_system_stats") or "sys_counts" not in st.session_state:
+        with st.spinner("Loading system stats..."):
+            st.session_state.sys_counts = get_system_pending_counts(kinds=("overtime",))
+    if st.session_state.sys_counts:
+        st.sidebar.metric("System Pending", st.session_state.sys_counts["overtime"])
+    else:
+        st.sidebar.warning("System stats unavailable")
 
 st.sidebar.markdown("---")
 st.sidebar.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
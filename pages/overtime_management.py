@@ -8,6 +8,7 @@ from utils.leave_system_db import (
     submit_overtime_request, get_employee_overtime_requests,
     get_employee_overtime_balance
 )
+from utils.dashboard_cache import clear_dashboard_cache
 import pandas as pd
 import calendar
 
@@ -251,6 +252,7 @@ with tab1:
                     result = submit_overtime_request(employee_id, overtime_data)
                     
                     if result["success"]:
+                        clear_dashboard_cache()
                         st.success(f"✅ {result['message']}")
                         st.balloons()
                         st.info("Your overtime request has been sent to your supervisor for approval.")
@@ -438,8 +440,8 @@ with tab3:
         st.write(f"📊 **Total Requests:** {len(filtered_requests)}")
         
         # Summary statistics
-        total_hours = sum([req.get("total_hours", 0) for req in filtered_requests])
-        approved_hours = sum([req.get("total_hours", 0) for req in filtered_requests if req.get("status") == "approved"])
+        total_hours = sum(req.get("total_hours", 0) for req in filtered_requests)
+        approved_hours = sum(req.get("total_hours", 0) for req in filtered_requests if req.get("status") == "approved")
         
         col1, col2, col3 = st.columns(3)
         
@@ -562,9 +564,9 @@ with tab4:
     else:
         # Year summary
         total_requests = len(year_requests)
-        total_hours_requested = sum([req.get("total_hours", 0) for req in year_requests])
+        total_hours_requested = sum(req.get("total_hours", 0) for req in year_requests)
         approved_requests = [req for req in year_requests if req.get("status") == "approved"]
-        total_hours_approved = sum([req.get("total_hours", 0) for req in approved_requests])
+        total_hours_approved = sum(req.get("total_hours", 0) for req in approved_requests)
         
         st.markdown(f"### 📊 {selected_year} Summary")
         
@@ -278,14 +278,8 @@ def force_password_change_form(username):
             try:
                 success, message = password_manager.update_password(username, new_password)
                 if success:
-                    st.success("✅ Password updated successfully!")
-                    st.balloons()
+                    st.toast("✅ Password updated successfully!")
                     st.session_state.force_password_change = False
-                    st.info("Redirecting to dashboard...")
-                    
-                    # Small delay for user to see the success message
-                    import time
-                    time.sleep(2)
                     st.rerun()
                 else:
                     st.error(f"Failed to update password: {message}")
@@ -497,8 +497,8 @@ with tab3:
         if filtered_payslips:
             st.markdown("### 📊 Summary")
             
-            total_gross = sum([p.get("gross_salary", 0) for p in filtered_payslips])
-            total_net = sum([p.get("net_salary", 0) for p in filtered_payslips])
+            total_gross = sum(p.get("gross_salary", 0) for p in filtered_payslips)
+            total_net = sum(p.get("net_salary", 0) for p in filtered_payslips)
             total_deductions = total_gross - total_net
             avg_gross = total_gross / len(filtered_payslips) if filtered_payslips else 0
             
@@ -561,7 +561,7 @@ completion_fields = [
     user_data.get('date_of_birth'),
 ]
 
-completed = sum([1 for field in completion_fields if field])
+completed = sum(1 for field in completion_fields if field)
 completion_rate = (completed / len(completion_fields)) * 100
 
 st.sidebar.progress(completion_rate / 100)
@@ -3,6 +3,13 @@ import streamlit_authenticator as stauth
 import utils.database as db
 import streamlit as st
 import time
+from enum import Enum
+
+class AuthState(Enum):
+    """Result of the cookie/session authentication check"""
+    AUTHENTICATED = "authenticated"
+    UNAUTHENTICATED = "unauthenticated"
+    LOGGED_OUT = "logged_out"
 
 def get_authenticator():
     # Check if authenticator already exists in session state
@@ -57,7 +64,11 @@ def check_authentication():
         # If cookie check fails, continue with normal flow
         pass
     
-    return authenticator
+    if st.session_state.get("logged_out", False):
+        return AuthState.LOGGED_OUT
+    if st.session_state.get("authentication_status") == True and st.session_state.get("username") is not None:
+        return AuthState.AUTHENTICATED
+    return AuthState.UNAUTHENTICATED
 
 def logout_user():
     """Dedicated logout function"""
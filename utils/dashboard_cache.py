@@ -0,0 +1,13 @@
+# Cached wrappers around the per-user queries shown on the dashboard
+import streamlit as st
+
+from utils.leave_system_db import get_dashboard_snapshot
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_dashboard_snapshot(employee_id, month, access_level):
+    """Leave/overtime balances, recent requests and pending approval counts"""
+    return get_dashboard_snapshot(employee_id, month, access_level)
+
+def clear_dashboard_cache():
+    """Drop cached dashboard data so new submissions show up immediately"""
+    cached_dashboard_snapshot.clear()
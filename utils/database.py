@@ -133,6 +133,13 @@ def to_datetime(d):
         return datetime.combine(d, time())
     return d
 
+def format_timestamp(ts, fmt="%d %b %Y", default="Unknown"):
+    """Format a Firestore timestamp in local time, or return default if it isn't one"""
+    try:
+        return ts.astimezone().strftime(fmt)
+    except (AttributeError, TypeError, ValueError, OSError):
+        return default
+
 def get_or_create_role(role_name, description=None):
     roles_ref = db.collection("roles")
     query = roles_ref.where("role_name", "==", role_name).limit(1).stream()
@@ -4,16 +4,11 @@ from google.cloud import firestore
 from firebase_admin.firestore import SERVER_TIMESTAMP
 from google.oauth2 import service_account
 from datetime import datetime, timedelta, date
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
 
-from utils.secrets_manager import secrets, get_firebase_credentials
-
-@st.cache_resource
-def get_db():
-    firebase_credentials = get_firebase_credentials()
-    project_id = secrets["firebase_auth"]["project_id"]  # or secrets.get_nested("firebase_auth", "project_id")
-    
-    db = firestore.Client(credentials=firebase_credentials, project=project_id)
-    return db
+# Share the process-wide Firestore client (and its gRPC channel pool) with utils.database
+from utils.database import get_db, get_all_roles, get_all_divisions
 
 db = get_db()
 
@@ -75,6 +70,14 @@ LEAVE_TYPES = {
     }
 }
 
+# Display name per leave type, for table and header rendering
+LEAVE_TYPE_NAMES = {key: config.get("name", "Unknown") for key, config in LEAVE_TYPES.items()}
+
+@st.cache_resource
+def get_query_executor():
+    """Shared thread pool for running independent Firestore lookups concurrently"""
+    return ThreadPoolExecutor(max_workers=6, thread_name_prefix="firestore-query")
+
 # OVERTIME SYSTEM FUNCTIONS
 
 # Updated submit_overtime_request function with better date handling
@@ -103,8 +106,10 @@ def submit_overtime_request(employee_id, overtime_data):
         if not approver_id:
             return {"success": False, "message": "No approver found. Please contact HR."}
         
-        # Get approver info
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        # Get employee and approver info in one batched read
+        users = get_users_by_ids([employee_id, approver_id])
+        employee_data = users.get(employee_id, {})
+        approver_data = users.get(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Create overtime request
@@ -124,11 +129,15 @@ def submit_overtime_request(employee_id, overtime_data):
             "updated_at": SERVER_TIMESTAMP
         }
         
+        # Snapshot employee/approver details so list views don't need user lookups
+        overtime_request_data.update(get_request_user_snapshot(employee_data, approver_data))
+        
         # Save to database
         request_ref = db.collection("overtime_requests").document()
         overtime_request_data["request_id"] = request_ref.id
         request_ref.set(overtime_request_data)
         
+        get_all_overtime_requests_admin.clear()
         return {
             "success": True,
             "message": f"Overtime request submitted successfully. Sent to {approver_name} for approval.",
@@ -236,7 +245,7 @@ def validate_overtime_request(employee_id, overtime_data):
                 return {"valid": False, "message": f"Invalid overtime hours: {entry['hours']}. Must be between 0.5-12 hours per day."}
         
         # Check total hours
-        calculated_total = sum([entry["hours"] for entry in overtime_data["overtime_entries"]])
+        calculated_total = sum(entry["hours"] for entry in overtime_data["overtime_entries"])
         if abs(calculated_total - overtime_data["total_hours"]) > 0.01:  # Allow small floating point differences
             return {"valid": False, "message": "Total hours mismatch with individual entries"}
         
@@ -295,13 +304,17 @@ def get_pending_overtime_approvals_for_approver(approver_id):
     try:
         query = db.collection("overtime_requests").where("approver_id", "==", approver_id).where("status", "==", "pending")
         
-        requests = []
+        raw_requests = []
         for doc in query.stream():
             request_data = doc.to_dict()
             request_data["id"] = doc.id
-            
-            # Enrich with employee data
-            employee_data = db.collection("users_db").document(request_data["employee_id"]).get().to_dict()
+            raw_requests.append(request_data)
+        
+        def enrich(request_data):
+            # Enrich with employee data (newer requests carry it already)
+            if "employee_name" in request_data:
+                return request_data
+            employee_data = get_user_doc(request_data["employee_id"])
             if employee_data:
                 # Get division and role names from their collections
                 division_data = db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
@@ -311,8 +324,10 @@ def get_pending_overtime_approvals_for_approver(approver_id):
                 request_data["employee_email"] = employee_data.get("email")
                 request_data["employee_division"] = division_data.get("division_name", "Unknown") if division_data else "Unknown"
                 request_data["employee_role"] = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-            
-            requests.append(request_data)
+            return request_data
+        
+        # Lookups are network-bound, so run them concurrently
+        requests = list(get_query_executor().map(enrich, raw_requests))
         
         requests.sort(key=lambda x: x.get("submitted_at", 0), reverse=True)
         return requests
@@ -321,6 +336,15 @@ def get_pending_overtime_approvals_for_approver(approver_id):
         print(f"Error getting pending overtime approvals: {e}")
         return []
 
+def count_pending_overtime_approvals_for_approver(approver_id):
+    """Count pending overtime requests for an approver without fetching them"""
+    try:
+        query = db.collection("overtime_requests").where("approver_id", "==", approver_id).where("status", "==", "pending")
+        return query.count().get()[0][0].value
+    except Exception as e:
+        print(f"Error counting pending overtime approvals: {e}")
+        return 0
+
 def approve_overtime_request(request_id, approver_id, comments=""):
     """Approve overtime request"""
     try:
@@ -337,7 +361,7 @@ def approve_overtime_request(request_id, approver_id, comments=""):
             return {"success": False, "message": "Request is not pending approval"}
         
         # Get approver info
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        approver_data = get_user_doc(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Update request status
@@ -353,6 +377,7 @@ def approve_overtime_request(request_id, approver_id, comments=""):
         # Add to employee's approved overtime balance
         update_employee_overtime_balance(request_data["employee_id"], request_data["total_hours"], "add")
         
+        get_all_overtime_requests_admin.clear()
         return {"success": True, "message": "Overtime request approved successfully"}
         
     except Exception as e:
@@ -375,7 +400,7 @@ def reject_overtime_request(request_id, approver_id, comments=""):
             return {"success": False, "message": "Request is not pending approval"}
         
         # Get approver info
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        approver_data = get_user_doc(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Update request status
@@ -388,6 +413,7 @@ def reject_overtime_request(request_id, approver_id, comments=""):
             "updated_at": SERVER_TIMESTAMP
         })
         
+        get_all_overtime_requests_admin.clear()
         return {"success": True, "message": "Overtime request rejected"}
         
     except Exception as e:
@@ -466,19 +492,17 @@ def get_overtime_report_data(month=None, division_id=None):
         
         query = db.collection("overtime_balances").where("month", "==", month)
         
-        report_data = []
-        for doc in query.stream():
-            balance_data = doc.to_dict()
+        def build_entry(balance_data):
             employee_id = balance_data["employee_id"]
             
             # Get employee info
-            employee_data = db.collection("users_db").document(employee_id).get().to_dict()
+            employee_data = get_user_doc(employee_id)
             if not employee_data:
-                continue
+                return None
             
             # Filter by division if specified
             if division_id and employee_data.get("division_id") != division_id:
-                continue
+                return None
             
             # Get division and role names
             division_data = db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
@@ -497,7 +521,11 @@ def get_overtime_report_data(month=None, division_id=None):
                 "calculated_pay": balance_data.get("balance_hours", 0) * employee_data.get("overtime_rate", 0)
             }
             
-            report_data.append(report_entry)
+            return report_entry
+        
+        balances = [doc.to_dict() for doc in query.stream()]
+        entries = get_query_executor().map(build_entry, balances)
+        report_data = [entry for entry in entries if entry]
         
         return report_data
         
@@ -580,6 +608,7 @@ def admin_approve_leave_request(request_id, admin_id, comments=""):
             update_leave_quota_pending(employee_id, working_days, "remove")
             update_leave_quota_used(employee_id, working_days, "add")
         
+        clear_leave_admin_cache()
         return {"success": True, "message": f"Leave request approved by admin ({admin_name})"}
         
     except Exception as e:
@@ -619,6 +648,7 @@ def admin_reject_leave_request(request_id, admin_id, comments=""):
             working_days = request_data["working_days"]
             update_leave_quota_pending(employee_id, working_days, "remove")
         
+        clear_leave_admin_cache()
         return {"success": True, "message": f"Leave request rejected by admin ({admin_name})"}
         
     except Exception as e:
@@ -655,6 +685,7 @@ def admin_override_overtime_request(request_id, admin_id, action, comments=""):
             # Add to employee's overtime balance
             update_employee_overtime_balance(request_data["employee_id"], request_data["total_hours"], "add")
             
+            get_all_overtime_requests_admin.clear()
             return {"success": True, "message": f"Overtime request approved by admin ({admin_name})"}
         
         elif action == "reject":
@@ -668,6 +699,7 @@ def admin_override_overtime_request(request_id, admin_id, action, comments=""):
                 "updated_at": SERVER_TIMESTAMP
             })
             
+            get_all_overtime_requests_admin.clear()
             return {"success": True, "message": f"Overtime request rejected by admin ({admin_name})"}
         
         else:
@@ -677,115 +709,240 @@ def admin_override_overtime_request(request_id, admin_id, action, comments=""):
         print(f"Error admin overriding overtime request: {e}")
         return {"success": False, "message": f"Error processing request: {str(e)}"}
 
+@st.cache_data(ttl=300, show_spinner=False)
+def get_user_doc(user_id):
+    """Read a users_db document, memoized for display lookups"""
+    if not user_id:
+        return {}
+    return db.collection("users_db").document(user_id).get().to_dict() or {}
+
+def get_users_by_ids(user_ids, fields=None):
+    """Fetch many users_db documents in batched reads, keyed by employee ID (optionally only some fields)"""
+    user_ids = [uid for uid in set(user_ids) if uid]
+    if not user_ids:
+        return {}
+    
+    def fetch_chunk(chunk):
+        refs = [db.collection("users_db").document(uid) for uid in chunk]
+        return {doc.id: doc.to_dict() for doc in db.get_all(refs, field_paths=fields) if doc.exists}
+    
+    # Chunks are fetched concurrently, one batched read per chunk
+    chunks = [user_ids[i:i + 100] for i in range(0, len(user_ids), 100)]
+    users = {}
+    for chunk_users in get_query_executor().map(fetch_chunk, chunks):
+        users.update(chunk_users)
+    return users
+
+def get_leave_quotas_by_ids(employee_ids, year=None):
+    """Fetch the leave quota records of many employees in batched reads, keyed by employee ID"""
+    year = year or datetime.now().year
+    employee_ids = [eid for eid in set(employee_ids) if eid]
+    if not employee_ids:
+        return {}
+    
+    def fetch_chunk(chunk):
+        refs = [db.collection("leave_quotas").document(f"{eid}_{year}") for eid in chunk]
+        return {doc.get("employee_id"): doc.to_dict() for doc in db.get_all(refs) if doc.exists}
+    
+    chunks = [employee_ids[i:i + 100] for i in range(0, len(employee_ids), 100)]
+    quotas = {}
+    for chunk_quotas in get_query_executor().map(fetch_chunk, chunks):
+        quotas.update(chunk_quotas)
+    return quotas
+
+def get_request_user_snapshot(employee_data, approver_data=None):
+    """Denormalized employee/approver display fields stored on request documents"""
+    roles = get_all_roles()
+    divisions = get_all_divisions()
+    
+    snapshot = {}
+    if employee_data:
+        snapshot.update({
+            "employee_name": employee_data.get("name"),
+            "employee_email": employee_data.get("email"),
+            "employee_division": divisions.get(employee_data.get("division_id", ""), {}).get("division_name", "Unknown"),
+            "employee_role": roles.get(employee_data.get("role_id", ""), {}).get("role_name", "Unknown"),
+            "employee_access_level": employee_data.get("access_level", 4)
+        })
+        supervisor_id = employee_data.get("direct_supervisor_id")
+        if supervisor_id:
+            supervisor_data = get_user_doc(supervisor_id)
+            snapshot["employee_supervisor_name"] = supervisor_data.get("name", "Unknown") if supervisor_data else "Unknown"
+    if approver_data:
+        snapshot.update({
+            "approver_role": roles.get(approver_data.get("role_id", ""), {}).get("role_name", "Unknown"),
+            "approver_division": divisions.get(approver_data.get("division_id", ""), {}).get("division_name", "Unknown"),
+            "approver_access_level": approver_data.get("access_level", 4)
+        })
+    return snapshot
+
+def clear_leave_admin_cache(include_pending=True):
+    """Invalidate cached admin and approver leave listings after a write"""
+    get_all_leave_requests_admin.clear()
+    get_leave_statistics.clear()
+    get_leave_request_counts.clear()
+    get_admin_quick_stats.clear()
+    # Single approve/reject callers drop the request from their own pending list instead
+    if include_pending:
+        get_pending_approvals_for_approver.clear()
+
+def enrich_leave_requests_admin(requests):
+    """Add employee, approver and final processor details to leave requests (in place)"""
+    # Look up every referenced user once instead of once per request;
+    # requests submitted with a stored user snapshot skip the lookup
+    user_ids = set()
+    for request_data in requests:
+        if "employee_name" not in request_data:
+            user_ids.add(request_data.get("employee_id"))
+        if "approver_role" not in request_data:
+            user_ids.add(request_data.get("approver_id"))
+        if not (request_data.get("approved_by_name") or request_data.get("rejected_by_name")):
+            user_ids.add(request_data.get("approved_by") or request_data.get("rejected_by"))
+    users = get_users_by_ids(user_ids)
+    roles = get_all_roles()
+    divisions = get_all_divisions()
+    
+    def role_name(user):
+        return roles.get(user.get("role_id", ""), {}).get("role_name", "Unknown")
+    
+    def division_name(user):
+        return divisions.get(user.get("division_id", ""), {}).get("division_name", "Unknown")
+    
+    for request_data in requests:
+        # Enrich with employee data
+        employee_data = users.get(request_data.get("employee_id"))
+        if employee_data:
+            request_data["employee_name"] = employee_data.get("name")
+            request_data["employee_email"] = employee_data.get("email")
+            request_data["employee_division"] = division_name(employee_data)
+            request_data["employee_role"] = role_name(employee_data)
+            request_data["employee_access_level"] = employee_data.get("access_level", 4)
+        
+        # Enrich with approver data
+        approver_data = users.get(request_data.get("approver_id"))
+        if approver_data:
+            request_data["approver_name"] = approver_data.get("name", "Unknown")
+            request_data["approver_role"] = role_name(approver_data)
+            request_data["approver_division"] = division_name(approver_data)
+            request_data["approver_access_level"] = approver_data.get("access_level", 4)
+        
+        # Add final processor info (who actually approved/rejected), stored on the request since approval
+        stored_processor_name = request_data.get("approved_by_name") or request_data.get("rejected_by_name")
+        processor_data = users.get(request_data.get("approved_by") or request_data.get("rejected_by"))
+        if stored_processor_name:
+            request_data["final_processor_name"] = stored_processor_name
+            request_data["is_admin_override"] = request_data.get("admin_override", False)
+        elif processor_data:
+            request_data["final_processor_name"] = processor_data.get("name", "Unknown")
+            request_data["final_processor_role"] = role_name(processor_data)
+            request_data["is_admin_override"] = request_data.get("admin_override", False)
+    
+    return requests
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_all_leave_requests_admin():
     """Get all leave requests with enhanced admin info"""
     try:
-        requests = []
         query = db.collection("leave_requests").order_by("submitted_at", direction=firestore.Query.DESCENDING)
         
+        requests = []
         for doc in query.stream():
             request_data = doc.to_dict()
             request_data["id"] = doc.id
-            
-            # Enrich with employee data
-            try:
-                employee_data = db.collection("users_db").document(request_data["employee_id"]).get().to_dict()
-                if employee_data:
-                    # Get division and role names
-                    division_data = db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
-                    role_data = db.collection("roles").document(employee_data.get("role_id", "")).get().to_dict()
-                    
-                    request_data["employee_name"] = employee_data.get("name")
-                    request_data["employee_email"] = employee_data.get("email")
-                    request_data["employee_division"] = division_data.get("division_name", "Unknown") if division_data else "Unknown"
-                    request_data["employee_role"] = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-                    request_data["employee_access_level"] = employee_data.get("access_level", 4)
-            except Exception as e:
-                print(f"Error enriching employee data: {e}")
-            
-            # Enrich with approver data
-            if request_data.get("approver_id"):
-                try:
-                    approver_data = db.collection("users_db").document(request_data["approver_id"]).get().to_dict()
-                    if approver_data:
-                        approver_division_data = db.collection("divisions").document(approver_data.get("division_id", "")).get().to_dict()
-                        approver_role_data = db.collection("roles").document(approver_data.get("role_id", "")).get().to_dict()
-                        
-                        request_data["approver_name"] = approver_data.get("name", "Unknown")
-                        request_data["approver_role"] = approver_role_data.get("role_name", "Unknown") if approver_role_data else "Unknown"
-                        request_data["approver_division"] = approver_division_data.get("division_name", "Unknown") if approver_division_data else "Unknown"
-                        request_data["approver_access_level"] = approver_data.get("access_level", 4)
-                except Exception as e:
-                    print(f"Error enriching approver data: {e}")
-            
-            # Add final processor info (who actually approved/rejected)
-            final_processor_id = request_data.get("approved_by") or request_data.get("rejected_by")
-            if final_processor_id:
-                try:
-                    processor_data = db.collection("users_db").document(final_processor_id).get().to_dict()
-                    if processor_data:
-                        processor_role_data = db.collection("roles").document(processor_data.get("role_id", "")).get().to_dict()
-                        request_data["final_processor_name"] = processor_data.get("name", "Unknown")
-                        request_data["final_processor_role"] = processor_role_data.get("role_name", "Unknown") if processor_role_data else "Unknown"
-                        request_data["is_admin_override"] = request_data.get("admin_override", False)
-                except Exception as e:
-                    print(f"Error enriching processor data: {e}")
-            
             requests.append(request_data)
         
-        return requests
+        return enrich_leave_requests_admin(requests)
         
     except Exception as e:
         print(f"Error getting all leave requests: {e}")
         return []
 
-def get_all_overtime_requests_admin():
-    """Get all overtime requests for admin view"""
+def get_leave_history_page_admin(page_size=50, start_after_id=None, status=None, division=None, leave_type=None):
+    """Get one page of processed leave requests, newest first, starting after a cursor document"""
     try:
+        query = db.collection("leave_requests")
+        
+        # Filter on the server (division uses the stored employee snapshot)
+        if status:
+            query = query.where("status", "==", status)
+        else:
+            query = query.where("status", "in", ["approved_final", "rejected"])
+        if division:
+            query = query.where("employee_division", "==", division)
+        if leave_type:
+            query = query.where("leave_type", "==", leave_type)
+        
+        # Keep the where -> order_by -> start_after -> limit order
+        query = query.order_by("submitted_at", direction=firestore.Query.DESCENDING)
+        
+        if start_after_id:
+            cursor_doc = db.collection("leave_requests").document(start_after_id).get()
+            if cursor_doc.exists:
+                query = query.start_after(cursor_doc)
+        
         requests = []
-        query = db.collection("overtime_requests").order_by("submitted_at", direction=firestore.Query.DESCENDING)
+        for doc in query.limit(page_size).stream():
+            request_data = doc.to_dict()
+            request_data["id"] = doc.id
+            requests.append(request_data)
+        
+        return enrich_leave_requests_admin(requests)
+        
+    except Exception as e:
+        print(f"Error getting leave history page: {e}")
+        return []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_all_overtime_requests_admin(status=None):
+    """Get all overtime requests for admin view, optionally only one status"""
+    try:
+        query = db.collection("overtime_requests")
         
+        # Filter on the server so only matching requests get enriched
+        if status:
+            query = query.where("status", "==", status)
+        
+        query = query.order_by("submitted_at", direction=firestore.Query.DESCENDING)
+        
+        requests = []
         for doc in query.stream():
             request_data = doc.to_dict()
             request_data["id"] = doc.id
-            
+            requests.append(request_data)
+        
+        # Look up every referenced user once instead of once per request;
+        # requests submitted with a stored user snapshot skip the lookup
+        user_ids = set()
+        for request_data in requests:
+            if "employee_name" not in request_data:
+                user_ids.add(request_data.get("employee_id"))
+            if "approver_role" not in request_data:
+                user_ids.add(request_data.get("approver_id"))
+            user_ids.add(request_data.get("approved_by") or request_data.get("rejected_by"))
+        users = get_users_by_ids(user_ids)
+        roles = get_all_roles()
+        divisions = get_all_divisions()
+        
+        for request_data in requests:
             # Enrich with employee data
-            try:
-                employee_data = db.collection("users_db").document(request_data["employee_id"]).get().to_dict()
-                if employee_data:
-                    division_data = db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
-                    role_data = db.collection("roles").document(employee_data.get("role_id", "")).get().to_dict()
-                    
-                    request_data["employee_name"] = employee_data.get("name")
-                    request_data["employee_email"] = employee_data.get("email")
-                    request_data["employee_division"] = division_data.get("division_name", "Unknown") if division_data else "Unknown"
-                    request_data["employee_role"] = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-            except Exception as e:
-                print(f"Error enriching employee data: {e}")
+            employee_data = users.get(request_data.get("employee_id"))
+            if employee_data:
+                request_data["employee_name"] = employee_data.get("name")
+                request_data["employee_email"] = employee_data.get("email")
+                request_data["employee_division"] = divisions.get(employee_data.get("division_id", ""), {}).get("division_name", "Unknown")
+                request_data["employee_role"] = roles.get(employee_data.get("role_id", ""), {}).get("role_name", "Unknown")
             
             # Enrich with approver data
-            if request_data.get("approver_id"):
-                try:
-                    approver_data = db.collection("users_db").document(request_data["approver_id"]).get().to_dict()
-                    if approver_data:
-                        approver_role_data = db.collection("roles").document(approver_data.get("role_id", "")).get().to_dict()
-                        request_data["approver_name"] = approver_data.get("name", "Unknown")
-                        request_data["approver_role"] = approver_role_data.get("role_name", "Unknown") if approver_role_data else "Unknown"
-                except Exception as e:
-                    print(f"Error enriching approver data: {e}")
+            approver_data = users.get(request_data.get("approver_id"))
+            if approver_data:
+                request_data["approver_name"] = approver_data.get("name", "Unknown")
+                request_data["approver_role"] = roles.get(approver_data.get("role_id", ""), {}).get("role_name", "Unknown")
             
             # Add final processor info
-            final_processor_id = request_data.get("approved_by") or request_data.get("rejected_by")
-            if final_processor_id:
-                try:
-                    processor_data = db.collection("users_db").document(final_processor_id).get().to_dict()
-                    if processor_data:
-                        request_data["final_processor_name"] = processor_data.get("name", "Unknown")
-                        request_data["is_admin_override"] = request_data.get("admin_override", False)
-                except Exception as e:
-                    print(f"Error enriching processor data: {e}")
-            
-            requests.append(request_data)
+            processor_data = users.get(request_data.get("approved_by") or request_data.get("rejected_by"))
+            if processor_data:
+                request_data["final_processor_name"] = processor_data.get("name", "Unknown")
+                request_data["is_admin_override"] = request_data.get("admin_override", False)
         
         return requests
         
@@ -916,26 +1073,25 @@ def get_employee_leave_quota(employee_id):
     try:
         current_year = datetime.now().year
         
-        # Get employee data to determine service duration
+        # Read the employee and their quota record in one round trip
         employee_ref = db.collection("users_db").document(employee_id)
-        employee_data = employee_ref.get().to_dict()
+        quota_ref = db.collection("leave_quotas").document(f"{employee_id}_{current_year}")
+        docs = {doc.reference.path: doc for doc in db.get_all([employee_ref, quota_ref])}
         
-        if not employee_data:
+        employee_doc = docs.get(employee_ref.path)
+        if not employee_doc or not employee_doc.exists:
             return None
-            
-        # Calculate annual leave quota based on service duration
-        start_date = employee_data.get("start_joining_date")
-        if hasattr(start_date, "timestamp"):
-            start_date = datetime.fromtimestamp(start_date.timestamp())
-        
-        service_months = (datetime.now() - start_date).days // 30
-        annual_quota = 14 if service_months > 12 else 10
-        
-        # Get or create leave quota record
-        quota_ref = db.collection("leave_quotas").document(f"{employee_id}_{current_year}")
-        quota_doc = quota_ref.get()
         
-        if not quota_doc.exists:
+        quota_doc = docs.get(quota_ref.path)
+        if not quota_doc or not quota_doc.exists:
+            # Calculate annual leave quota based on service duration
+            start_date = employee_doc.to_dict().get("start_joining_date")
+            if hasattr(start_date, "timestamp"):
+                start_date = datetime.fromtimestamp(start_date.timestamp())
+            
+            service_months = (datetime.now() - start_date).days // 30
+            annual_quota = 14 if service_months > 12 else 10
+            
             # Create initial quota record
             quota_data = {
                 "employee_id": employee_id,
@@ -948,8 +1104,8 @@ def get_employee_leave_quota(employee_id):
             }
             quota_ref.set(quota_data)
             return quota_data
-        else:
-            return quota_doc.to_dict()
+        
+        return quota_doc.to_dict()
             
     except Exception as e:
         print(f"Error getting leave quota: {e}")
@@ -971,8 +1127,10 @@ def submit_leave_request(employee_id, leave_data):
         if not approver_id:
             return {"success": False, "message": "No approver found. Please contact HR."}
         
-        # Get approver info for confirmation
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        # Get employee and approver info in one batched read
+        users = get_users_by_ids([employee_id, approver_id])
+        employee_data = users.get(employee_id, {})
+        approver_data = users.get(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Create leave request
@@ -992,6 +1150,9 @@ def submit_leave_request(employee_id, leave_data):
             "updated_at": SERVER_TIMESTAMP
         }
         
+        # Snapshot employee/approver details so list views don't need user lookups
+        leave_request_data.update(get_request_user_snapshot(employee_data, approver_data))
+        
         # Add additional fields for certain leave types
         if leave_data["leave_type"] in ["maternity", "marriage"]:
             leave_request_data["emergency_contact"] = leave_data.get("emergency_contact")
@@ -1008,6 +1169,7 @@ def submit_leave_request(employee_id, leave_data):
         if leave_data["leave_type"] == "annual":
             update_leave_quota_pending(employee_id, working_days, "add")
         
+        clear_leave_admin_cache()
         return {
             "success": True, 
             "message": f"Leave request submitted successfully. Sent to {approver_name} for approval.",
@@ -1019,6 +1181,7 @@ def submit_leave_request(employee_id, leave_data):
         print(f"Error submitting leave request: {e}")
         return {"success": False, "message": f"Error submitting request: {str(e)}"}
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_pending_approvals_for_approver(approver_id):
     """Get pending leave requests for approval by a specific approver"""
     try:
@@ -1029,8 +1192,10 @@ def get_pending_approvals_for_approver(approver_id):
             request_data = doc.to_dict()
             request_data["id"] = doc.id
             
-            # Enrich with employee data
-            employee_data = db.collection("users_db").document(request_data["employee_id"]).get().to_dict()
+            # Enrich with employee data (newer requests carry it already)
+            employee_data = None
+            if "employee_name" not in request_data:
+                employee_data = get_user_doc(request_data["employee_id"])
             if employee_data:
                 # Get division and role names from their collections
                 division_data = db.collection("divisions").document(employee_data.get("division_id", "")).get().to_dict()
@@ -1052,6 +1217,15 @@ def get_pending_approvals_for_approver(approver_id):
         print(f"Error getting pending approvals: {e}")
         return []
 
+def count_pending_approvals_for_approver(approver_id):
+    """Count pending leave requests for an approver without fetching them"""
+    try:
+        query = db.collection("leave_requests").where("approver_id", "==", approver_id).where("status", "==", "pending")
+        return query.count().get()[0][0].value
+    except Exception as e:
+        print(f"Error counting pending approvals: {e}")
+        return 0
+
 def approve_leave_request(request_id, approver_id, comments=""):
     """Approve a leave request"""
     try:
@@ -1068,7 +1242,7 @@ def approve_leave_request(request_id, approver_id, comments=""):
             return {"success": False, "message": "Request is not pending approval"}
         
         # Get approver info
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        approver_data = get_user_doc(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Update request status
@@ -1090,6 +1264,7 @@ def approve_leave_request(request_id, approver_id, comments=""):
             update_leave_quota_pending(employee_id, working_days, "remove")
             update_leave_quota_used(employee_id, working_days, "add")
         
+        clear_leave_admin_cache(include_pending=False)
         return {"success": True, "message": "Leave request approved successfully"}
         
     except Exception as e:
@@ -1112,7 +1287,7 @@ def reject_leave_request(request_id, approver_id, comments=""):
             return {"success": False, "message": "Request is not pending approval"}
         
         # Get approver info
-        approver_data = db.collection("users_db").document(approver_id).get().to_dict()
+        approver_data = get_user_doc(approver_id)
         approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
         
         # Update request status
@@ -1131,12 +1306,92 @@ def reject_leave_request(request_id, approver_id, comments=""):
             working_days = request_data["working_days"]
             update_leave_quota_pending(employee_id, working_days, "remove")
         
+        clear_leave_admin_cache(include_pending=False)
         return {"success": True, "message": "Leave request rejected"}
         
     except Exception as e:
         print(f"Error rejecting leave request: {e}")
         return {"success": False, "message": f"Error rejecting request: {str(e)}"}
 
+def bulk_process_leave_requests(request_ids, approver_id, action, comments=""):
+    """Approve or reject many leave requests with batched reads and writes"""
+    try:
+        request_ids = list(request_ids)
+        if not request_ids:
+            return {"success": False, "message": "No requests selected", "processed": 0}
+        
+        # Read all selected requests in batched reads
+        refs = [db.collection("leave_requests").document(rid) for rid in request_ids]
+        request_docs = []
+        for i in range(0, len(refs), 100):
+            request_docs.extend(doc for doc in db.get_all(refs[i:i + 100]) if doc.exists)
+        
+        approver_data = get_user_doc(approver_id)
+        approver_name = approver_data.get("name", "Unknown") if approver_data else "Unknown"
+        
+        if action == "approve":
+            status_update = {
+                "status": "approved_final",
+                "approved_by": approver_id,
+                "approved_by_name": approver_name,
+                "approved_at": SERVER_TIMESTAMP
+            }
+        else:
+            status_update = {
+                "status": "rejected",
+                "rejected_by": approver_id,
+                "rejected_by_name": approver_name,
+                "rejected_at": SERVER_TIMESTAMP
+            }
+        status_update.update({"approver_comments": comments, "updated_at": SERVER_TIMESTAMP})
+        
+        # Only this approver's still-pending requests are processed
+        writes = []
+        annual_days = {}
+        for doc in request_docs:
+            request_data = doc.to_dict()
+            if request_data.get("approver_id") != approver_id or request_data.get("status") != "pending":
+                continue
+            writes.append((doc.reference, status_update))
+            if request_data.get("leave_type") == "annual":
+                employee_id = request_data["employee_id"]
+                annual_days[employee_id] = annual_days.get(employee_id, 0) + request_data.get("working_days", 0)
+        
+        processed = len(writes)
+        if not processed:
+            return {"success": False, "message": "No pending requests to process", "processed": 0}
+        
+        # Move annual days out of pending (and into used on approval), one update per employee
+        if annual_days:
+            for employee_id, quota_data in get_leave_quotas_by_ids(annual_days.keys()).items():
+                days = annual_days[employee_id]
+                quota_update = {
+                    "annual_pending": max(0, quota_data.get("annual_pending", 0) - days),
+                    "updated_at": SERVER_TIMESTAMP
+                }
+                if action == "approve":
+                    quota_update["annual_used"] = quota_data.get("annual_used", 0) + days
+                quota_ref = db.collection("leave_quotas").document(f"{employee_id}_{datetime.now().year}")
+                writes.append((quota_ref, quota_update))
+        
+        # Firestore batches hold at most 500 writes; commit the chunks concurrently
+        def commit_chunk(chunk):
+            batch = db.batch()
+            for ref, update in chunk:
+                batch.update(ref, update)
+            batch.commit()
+        
+        chunks = [writes[i:i + 500] for i in range(0, len(writes), 500)]
+        list(get_query_executor().map(commit_chunk, chunks))
+        
+        clear_leave_admin_cache()
+        verb = "approved" if action == "approve" else "rejected"
+        return {"success": True, "message": f"Bulk {verb} {processed} requests", "processed": processed}
+        
+    except Exception as e:
+        print(f"Error bulk processing leave requests: {e}")
+        return {"success": False, "message": f"Error processing requests: {str(e)}", "processed": 0}
+
 def validate_leave_request(employee_id, leave_data):
     """Validate leave request against business rules"""
     leave_type = leave_data["leave_type"]
@@ -1292,7 +1547,7 @@ def reset_annual_leave_quotas():
         current_year = datetime.now().year
         
         # Get all employees
-        employees = db.collection("users_db").where("is_active", "==", True).stream()
+        employees = db.collection("users_db").where("is_active", "==", True).select(["start_joining_date"]).stream()
         
         reset_count = 0
         for employee_doc in employees:
@@ -1327,6 +1582,58 @@ def reset_annual_leave_quotas():
         print(f"Error resetting annual quotas: {e}")
         return {"success": False, "message": f"Error resetting quotas: {str(e)}"}
 
+def backfill_request_user_snapshots(collection_name="leave_requests"):
+    """Store employee/approver snapshot fields on requests submitted before they existed (Admin function)"""
+    try:
+        # Only the IDs are needed to decide what to patch
+        docs = [
+            doc for doc in db.collection(collection_name).select(["employee_id", "approver_id", "employee_name"]).stream()
+            if not doc.to_dict().get("employee_name")
+        ]
+        if not docs:
+            return {"success": True, "message": "All requests already have user snapshots"}
+        
+        requests = [(doc.reference, doc.to_dict()) for doc in docs]
+        users = get_users_by_ids(
+            [data.get("employee_id") for _, data in requests] + [data.get("approver_id") for _, data in requests]
+        )
+        
+        # Build each employee/approver pair's snapshot once
+        snapshots = {}
+        batch = db.batch()
+        op_count = 0
+        for ref, data in requests:
+            pair = (data.get("employee_id"), data.get("approver_id"))
+            if pair not in snapshots:
+                approver_data = users.get(pair[1])
+                snapshot = get_request_user_snapshot(users.get(pair[0]), approver_data)
+                if approver_data:
+                    snapshot["approver_name"] = approver_data.get("name", "Unknown")
+                snapshots[pair] = snapshot
+            
+            if not snapshots[pair]:
+                continue
+            
+            batch.update(ref, snapshots[pair])
+            op_count += 1
+            # Firestore caps a batch at 500 writes
+            if op_count % 500 == 0:
+                batch.commit()
+                batch = db.batch()
+        
+        if op_count % 500:
+            batch.commit()
+        
+        if op_count:
+            clear_leave_admin_cache()
+        
+        return {"success": True, "message": f"Backfilled user snapshots on {op_count} {collection_name.replace('_', ' ')}"}
+        
+    except Exception as e:
+        print(f"Error backfilling request snapshots: {e}")
+        return {"success": False, "message": f"Error backfilling snapshots: {str(e)}"}
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_leave_statistics(employee_id=None, division_id=None, year=None):
     """Get leave statistics for reporting"""
     try:
@@ -1347,30 +1654,30 @@ def get_leave_statistics(employee_id=None, division_id=None, year=None):
         if employee_id:
             query = query.where("employee_id", "==", employee_id)
         
-        # Filter by year
-        for doc in query.stream():
-            request_data = doc.to_dict()
-            request_year = datetime.strptime(request_data["start_date"], "%Y-%m-%d").year
-            
-            if request_year != year:
-                continue
-            
-            stats["total_requests"] += 1
-            
-            status = request_data.get("status", "pending")
-            if status == "approved_final":
-                stats["approved_requests"] += 1
-                stats["total_days_taken"] += request_data.get("working_days", 0)
-            elif status == "pending":
-                stats["pending_requests"] += 1
-            elif status == "rejected":
-                stats["rejected_requests"] += 1
-            
-            # By leave type
-            leave_type = request_data.get("leave_type", "unknown")
-            if leave_type not in stats["by_leave_type"]:
-                stats["by_leave_type"][leave_type] = 0
-            stats["by_leave_type"][leave_type] += 1
+        # Count on one DataFrame instead of hand-rolled counters, pulling only the counted fields
+        stat_fields = ["start_date", "status", "leave_type", "working_days"]
+        df = pd.DataFrame(
+            [doc.to_dict() for doc in query.select(stat_fields).stream()],
+            columns=stat_fields
+        )
+        
+        # Filter by year, parsing all start dates in one vectorized call
+        start_dates = pd.to_datetime(df["start_date"], format="%Y-%m-%d", errors="coerce")
+        df = df[start_dates.dt.year == year].copy()
+        if df.empty:
+            return stats
+        
+        df["status"] = df["status"].fillna("pending").astype("category")
+        df["leave_type"] = df["leave_type"].fillna("unknown").astype("category")
+        df["working_days"] = pd.to_numeric(df["working_days"], errors="coerce").fillna(0)
+        
+        status_counts = df["status"].value_counts()
+        stats["total_requests"] = len(df)
+        stats["approved_requests"] = int(status_counts.get("approved_final", 0))
+        stats["pending_requests"] = int(status_counts.get("pending", 0))
+        stats["rejected_requests"] = int(status_counts.get("rejected", 0))
+        stats["total_days_taken"] = df.loc[df["status"] == "approved_final", "working_days"].sum().item()
+        stats["by_leave_type"] = {leave_type: int(count) for leave_type, count in df["leave_type"].value_counts().items() if count}
         
         return stats
         
@@ -1378,9 +1685,21 @@ def get_leave_statistics(employee_id=None, division_id=None, year=None):
         print(f"Error getting leave statistics: {e}")
         return None
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_team_members(supervisor_id):
     """Get all team members who report to a specific supervisor"""
     try:
+        # Division and role names come from the cached lookup maps, not one read per member
+        roles = get_all_roles()
+        divisions = get_all_divisions()
+        
+        def add_names(employee_data):
+            if employee_data.get("division_id"):
+                employee_data["division_name"] = divisions.get(employee_data["division_id"], {}).get("division_name", "Unknown")
+            if employee_data.get("role_id"):
+                employee_data["role_name"] = roles.get(employee_data["role_id"], {}).get("role_name", "Unknown")
+            return employee_data
+        
         # Get employees where direct_supervisor_id equals supervisor_id
         direct_reports = []
         direct_query = db.collection("users_db").where("direct_supervisor_id", "==", supervisor_id).stream()
@@ -1388,26 +1707,19 @@ def get_team_members(supervisor_id):
         for doc in direct_query:
             employee_data = doc.to_dict()
             employee_data["employee_id"] = doc.id
-            
-            # Get division and role names
-            if employee_data.get("division_id"):
-                division_data = db.collection("divisions").document(employee_data["division_id"]).get().to_dict()
-                employee_data["division_name"] = division_data.get("division_name", "Unknown") if division_data else "Unknown"
-            
-            if employee_data.get("role_id"):
-                role_data = db.collection("roles").document(employee_data["role_id"]).get().to_dict()
-                employee_data["role_name"] = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-            
-            direct_reports.append(employee_data)
+            direct_reports.append(add_names(employee_data))
         
         # Also get employees from divisions where this person is head
         division_reports = []
-        division_query = db.collection("divisions").where("head_employee_id", "==", supervisor_id).stream()
-        
-        for div_doc in division_query:
-            division_id = div_doc.id
-            # Get all employees in this division who don't have a direct supervisor
-            emp_query = db.collection("users_db").where("division_id", "==", division_id).stream()
+        direct_ids = {dr["employee_id"] for dr in direct_reports}
+        headed_division_ids = [
+            division_id for division_id, division in divisions.items()
+            if division.get("head_employee_id") == supervisor_id
+        ]
+        
+        # One query per 30 divisions (Firestore "in" limit) instead of one per division
+        for i in range(0, len(headed_division_ids), 30):
+            emp_query = db.collection("users_db").where("division_id", "in", headed_division_ids[i:i + 30]).stream()
             
             for emp_doc in emp_query:
                 emp_data = emp_doc.to_dict()
@@ -1415,18 +1727,9 @@ def get_team_members(supervisor_id):
                 if not emp_data.get("direct_supervisor_id") or emp_data.get("direct_supervisor_id") == supervisor_id:
                     emp_data["employee_id"] = emp_doc.id
                     
-                    # Get division and role names
-                    if emp_data.get("division_id"):
-                        division_data = db.collection("divisions").document(emp_data["division_id"]).get().to_dict()
-                        emp_data["division_name"] = division_data.get("division_name", "Unknown") if division_data else "Unknown"
-                    
-                    if emp_data.get("role_id"):
-                        role_data = db.collection("roles").document(emp_data["role_id"]).get().to_dict()
-                        emp_data["role_name"] = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-                    
                     # Avoid duplicates from direct reports
-                    if emp_data["employee_id"] not in [dr["employee_id"] for dr in direct_reports]:
-                        division_reports.append(emp_data)
+                    if emp_data["employee_id"] not in direct_ids:
+                        division_reports.append(add_names(emp_data))
         
         return {
             "direct_reports": direct_reports,
@@ -1441,56 +1744,172 @@ def get_team_members(supervisor_id):
 def get_approval_chain(employee_id):
     """Get the complete approval chain for an employee"""
     try:
-        employee_ref = db.collection("users_db").document(employee_id)
-        employee_data = employee_ref.get().to_dict()
+        employee_data = get_user_doc(employee_id)
         
         if not employee_data:
             return []
         
+        # Org structure comes from the cached role/division maps; both approvers in one batched read
+        roles = get_all_roles()
+        divisions = get_all_divisions()
+        direct_supervisor_id = employee_data.get("direct_supervisor_id")
+        division_head_id = divisions.get(employee_data.get("division_id", ""), {}).get("head_employee_id")
+        approvers = get_users_by_ids([direct_supervisor_id, division_head_id])
+        
+        def chain_entry(level, chain_type, approver_id):
+            approver_data = approvers[approver_id]
+            return {
+                "level": level,
+                "type": chain_type,
+                "employee_id": approver_id,
+                "name": approver_data.get("name"),
+                "role": roles.get(approver_data.get("role_id", ""), {}).get("role_name", "Unknown"),
+                "access_level": approver_data.get("access_level")
+            }
+        
         approval_chain = []
         
         # Level 1: Direct Supervisor
-        direct_supervisor_id = employee_data.get("direct_supervisor_id")
-        if direct_supervisor_id:
-            supervisor_data = db.collection("users_db").document(direct_supervisor_id).get().to_dict()
-            if supervisor_data:
-                # Get role name
-                role_data = db.collection("roles").document(supervisor_data.get("role_id", "")).get().to_dict()
-                role_name = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-                
-                approval_chain.append({
-                    "level": 1,
-                    "type": "direct_supervisor",
-                    "employee_id": direct_supervisor_id,
-                    "name": supervisor_data.get("name"),
-                    "role": role_name,
-                    "access_level": supervisor_data.get("access_level")
-                })
+        if direct_supervisor_id in approvers:
+            approval_chain.append(chain_entry(1, "direct_supervisor", direct_supervisor_id))
         
         # Level 2: Division Head (if different from direct supervisor)
-        division_id = employee_data.get("division_id")
-        if division_id:
-            division_data = db.collection("divisions").document(division_id).get().to_dict()
-            division_head_id = division_data.get("head_employee_id")
-            
-            if division_head_id and division_head_id != direct_supervisor_id:
-                head_data = db.collection("users_db").document(division_head_id).get().to_dict()
-                if head_data:
-                    # Get role name
-                    role_data = db.collection("roles").document(head_data.get("role_id", "")).get().to_dict()
-                    role_name = role_data.get("role_name", "Unknown") if role_data else "Unknown"
-                    
-                    approval_chain.append({
-                        "level": 2,
-                        "type": "division_head",
-                        "employee_id": division_head_id,
-                        "name": head_data.get("name"),
-                        "role": role_name,
-                        "access_level": head_data.get("access_level")
-                    })
+        if division_head_id and division_head_id != direct_supervisor_id and division_head_id in approvers:
+            approval_chain.append(chain_entry(2, "division_head", division_head_id))
         
         return approval_chain
         
     except Exception as e:
         print(f"Error getting approval chain: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_pending_count(employee_id, kind):
+    """Count an employee's own pending leave or overtime requests server-side"""
+    try:
+        collection = "leave_requests" if kind == "leave" else "overtime_requests"
+        query = db.collection(collection).where("employee_id", "==", employee_id).where("status", "==", "pending")
+        return query.count().get()[0][0].value
+    except Exception as e:
+        print(f"Error counting pending {kind} requests: {e}")
+        return 0
+
+def get_system_pending_counts(kinds=("leave", "overtime"), timeout=5):
+    """Count pending leave and/or overtime requests across the organization (None on failure)"""
+    collections = {"leave": "leave_requests", "overtime": "overtime_requests"}
+    counts = {}
+    try:
+        # Only the requested kinds are counted, one aggregation each
+        for kind in kinds:
+            query = db.collection(collections[kind]).where("status", "==", "pending")
+            counts[kind] = query.count().get(timeout=timeout)[0][0].value
+        return counts
+    except Exception as e:
+        print(f"Error counting system pending requests: {e}")
+        return None
+
+@st.cache_data(ttl=120, show_spinner=False)
+def get_admin_quick_stats():
+    """Count pending leave requests and active users server-side (None on failure)"""
+    try:
+        pending_query = db.collection("leave_requests").where("status", "==", "pending")
+        active_query = db.collection("users_db").where("is_active", "==", True)
+        
+        # Both aggregations run concurrently, one RPC each
+        pending_count, active_count = get_query_executor().map(
+            lambda query: query.count().get()[0][0].value,
+            [pending_query, active_query]
+        )
+        return {"pending_leave": pending_count, "active_users": active_count}
+    except Exception as e:
+        print(f"Error counting admin quick stats: {e}")
+        return None
+
+def get_dashboard_snapshot(employee_id, month, access_level):
+    """Get everything the dashboard needs for an employee in as few round-trips as possible"""
+    snapshot = {
+        "leave_quota": None,
+        "recent_leave_requests": [],
+        "overtime_balance": None,
+        "recent_overtime_requests": [],
+        "pending_leave_requests": 0,
+        "pending_overtime_requests": 0,
+        "pending_leave_approvals": 0,
+        "pending_overtime_approvals": 0
+    }
+    
+    try:
+        current_year = datetime.now().year
+        
+        # Independent lookups run concurrently; latency is the slowest call, not the sum
+        calls = {
+            "recent_leave_requests": (get_employee_leave_requests, (employee_id, 5)),
+            "recent_overtime_requests": (get_employee_overtime_requests, (employee_id, 5)),
+            "pending_leave_requests": (get_pending_count, (employee_id, "leave")),
+            "pending_overtime_requests": (get_pending_count, (employee_id, "overtime"))
+        }
+        if access_level <= 3:
+            calls["pending_leave_approvals"] = (count_pending_approvals_for_approver, (employee_id,))
+            calls["pending_overtime_approvals"] = (count_pending_overtime_approvals_for_approver, (employee_id,))
+        
+        executor = get_query_executor()
+        futures = {name: executor.submit(fn, *args) for name, (fn, args) in calls.items()}
+        
+        # Fetch both balance documents in a single batched read
+        quota_ref = db.collection("leave_quotas").document(f"{employee_id}_{current_year}")
+        balance_ref = db.collection("overtime_balances").document(f"{employee_id}_{month}")
+        docs = {doc.reference.path: doc for doc in db.get_all([quota_ref, balance_ref])}
+        
+        quota_doc = docs.get(quota_ref.path)
+        if quota_doc and quota_doc.exists:
+            snapshot["leave_quota"] = quota_doc.to_dict()
+        else:
+            # Falls back to the full lookup, which creates the quota record
+            snapshot["leave_quota"] = get_employee_leave_quota(employee_id)
+        
+        balance_doc = docs.get(balance_ref.path)
+        if balance_doc and balance_doc.exists:
+            snapshot["overtime_balance"] = balance_doc.to_dict()
+        else:
+            snapshot["overtime_balance"] = {
+                "employee_id": employee_id,
+                "month": month,
+                "approved_hours": 0,
+                "paid_hours": 0,
+                "balance_hours": 0
+            }
+        
+        for name, future in futures.items():
+            snapshot[name] = future.result()
+        
+        return snapshot
+        
+    except Exception as e:
+        print(f"Error getting dashboard snapshot: {e}")
+        return snapshot
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_leave_request_counts(year):
+    """Count a year's leave requests in total, by status and by leave type using server-side aggregations"""
+    try:
+        base = db.collection("leave_requests").where("created_at", ">=", datetime(year, 1, 1))
+        
+        queries = [("total", None, base)]
+        for status in ("approved_final", "pending", "rejected"):
+            queries.append(("by_status", status, base.where("status", "==", status)))
+        for leave_type in LEAVE_TYPES:
+            queries.append(("by_leave_type", leave_type, base.where("leave_type", "==", leave_type)))
+        
+        # Each count() is a single aggregation read; run them concurrently
+        values = get_query_executor().map(lambda q: q[2].count().get()[0][0].value, queries)
+        
+        counts = {"total": 0, "by_status": {}, "by_leave_type": {}}
+        for (group, key, _), value in zip(queries, values):
+            if group == "total":
+                counts["total"] = value
+            else:
+                counts[group][key] = value
+        return counts
+        
+    except Exception as e:
+        print(f"Error counting leave requests: {e}")
+        return None
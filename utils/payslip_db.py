@@ -209,13 +209,13 @@ def get_payslip_statistics(employee_id=None, year=None, division_id=None):
         # Calculate statistics
         stats = {
             "total_payslips": len(payslips),
-            "total_gross_salary": sum([p.get("gross_salary", 0) for p in payslips]),
-            "total_net_salary": sum([p.get("net_salary", 0) for p in payslips]),
+            "total_gross_salary": sum(p.get("gross_salary", 0) for p in payslips),
+            "total_net_salary": sum(p.get("net_salary", 0) for p in payslips),
             "total_deductions": 0,
             "average_gross_salary": 0,
             "average_net_salary": 0,
-            "paid_payslips": len([p for p in payslips if p.get("status") == "paid"]),
-            "pending_payslips": len([p for p in payslips if p.get("status") == "pending"])
+            "paid_payslips": sum(1 for p in payslips if p.get("status") == "paid"),
+            "pending_payslips": sum(1 for p in payslips if p.get("status") == "pending")
         }
         
         stats["total_deductions"] = stats["total_gross_salary"] - stats["total_net_salary"]